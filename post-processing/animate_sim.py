@@ -7,17 +7,10 @@ import matplotlib.patches as patches
 from matplotlib.animation import FuncAnimation, FFMpegWriter
 from typing import Tuple, List
 
-ENCLOSURE = 0.09
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
+from simulation_io import read_static
 
-def read_static(static_path: Path):
-    with static_path.open("r") as f:
-        N = int(f.readline().strip())
-        L = float(f.readline().strip())
-        R = float(f.readline().strip())
-        M = float(f.readline().strip())
-        V = float(f.readline().strip())
-        T = float(f.readline().strip())
-    return N, L, R, M, V, T
+ENCLOSURE = 0.09
 
 def read_dynamic(dynamic_path: Path, N: int):
     """Return times (F,), pos (F,N,2), vel (F,N,2)"""
@@ -87,7 +80,9 @@ def main(folder: Path, out_name: str = "animation.mp4"):
         raise FileNotFoundError(f"Expected static.txt and dynamic.txt in {folder}")
 
     N, L, R, M, V, T = read_static(static_path)
-    times, pos, vel = read_dynamic(dynamic_path, N)
+    with stage("carga") as st:
+        times, pos, vel = read_dynamic(dynamic_path, N)
+        st.add(len(times))
     F = len(times)
 
     fig, ax = plt.subplots(figsize=(8, 4))
@@ -124,7 +119,8 @@ def main(folder: Path, out_name: str = "animation.mp4"):
     out_path = folder / out_name
     try:
         writer = FFMpegWriter(fps=60, bitrate=2400)
-        anim.save(out_path, writer=writer)
+        with stage("render", items=F):
+            anim.save(out_path, writer=writer)
     except Exception as e:
         print("Warning: Could not export MP4 (ffmpeg missing?). Showing animation instead.", e)
         plt.show()
@@ -137,5 +133,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("folder", type=Path, help="Folder containing static.txt and dynamic.txt")
     parser.add_argument("--out", type=str, default="animation.mp4")
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    setup_profiling(args)
     main(args.folder, args.out)
@@ -4,21 +4,15 @@ from typing import List, Tuple
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
-from matplotlib.animation import FuncAnimation, FFMpegWriter
+from matplotlib.animation import FuncAnimation, FFMpegWriter, PillowWriter
 
+from kernels import ballistic
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
+from simulation_io import COMPACT_MODES, DEFAULT_CHUNK_FRAMES, load_run, read_static
+from streaming_stats import QuantileSketch
 
-ENCLOSURE = 0.09
-
-def read_static(static_path: Path):
-    with static_path.open("r") as f:
-        N = int(f.readline().strip())
-        L = float(f.readline().strip())
-        R = float(f.readline().strip())
-        M = float(f.readline().strip())
-        V = float(f.readline().strip())
-        T = float(f.readline().strip())
-    return N, L, R, M, V, T
 
+ENCLOSURE = 0.09
 
 def read_dynamic(dynamic_path: Path, N: int):
     """Return times (F,), pos (F,N,2), vel (F,N,2).
@@ -67,7 +61,7 @@ def read_dynamic(dynamic_path: Path, N: int):
     return np.array(times), np.stack(positions), np.stack(velocities)
 
 
-def create_axes(ax, L: float):
+def create_axes(ax, L: float, facecolor="white"):
     y0 = (ENCLOSURE - L) / 2.0
     y1 = y0 + L
 
@@ -85,7 +79,7 @@ def create_axes(ax, L: float):
 
     domain = patches.Polygon(
         verts, closed=True,
-        facecolor="white", edgecolor="black",
+        facecolor=facecolor, edgecolor="black",
         linewidth=1, joinstyle="miter"
     )
     ax.add_patch(domain)
@@ -97,20 +91,29 @@ def create_axes(ax, L: float):
     ax.axis("off")
 
 
-def animate_realtime(folder: Path, out_name: str = "animation_rt.mp4", fps: int = 60, speed: float = 1.0):
+def animate_realtime(folder: Path, out_name: str = "animation_rt.mp4", fps: int = 60, speed: float = 1.0,
+                     compact: str | None = None, duration: float | None = None, show: bool = True):
     static_path = folder / "static.txt"
     dynamic_path = folder / "dynamic.txt"
     if not static_path.exists() or not dynamic_path.exists():
         raise FileNotFoundError(f"Expected static.txt and dynamic.txt in {folder}")
 
     N, L, R, M, V, T = read_static(static_path)
-    times, pos, vel = read_dynamic(dynamic_path, N)
+    with stage("carga") as st:
+        if compact is None:
+            times, pos, vel = read_dynamic(dynamic_path, N)
+        else:
+            times, pos, vel = load_run(dynamic_path, N, compact=compact)[:3]
+        st.add(len(times))
 
     fig, ax = plt.subplots(figsize=(8, 4))
     create_axes(ax, L)
 
-    speeds_all = np.linalg.norm(vel.reshape(-1, 2), axis=1)
-    s_med = float(np.median(speeds_all)) if speeds_all.size > 0 else 0.0
+    # Mediana aproximada de |v| sin materializar todas las rapideces a la vez
+    sketch = QuantileSketch()
+    for k in range(0, len(times), DEFAULT_CHUNK_FRAMES):
+        sketch.update(np.hypot(vel[k:k + DEFAULT_CHUNK_FRAMES, :, 0], vel[k:k + DEFAULT_CHUNK_FRAMES, :, 1]))
+    s_med = sketch.quantile(0.5) if sketch.count > 0 else 0.0
     target_len = 0.05 * ENCLOSURE
     q_scale = (s_med / target_len) if s_med > 0 else 1.0
 
@@ -133,8 +136,12 @@ def animate_realtime(folder: Path, out_name: str = "animation_rt.mp4", fps: int
 
     dt_play = 1.0 / float(fps)
     t_start, t_end = float(times[0]), float(times[-1])
+    if duration is not None:
+        t_end = min(t_end, t_start + duration)
     t_play = np.arange(t_start, t_end + 1e-12, dt_play / float(speed))
 
+    pos_buf = np.empty((N, 2))
+
     def state_at_time(t: float):
         k = int(np.searchsorted(times, t, side="right"))
         if k <= 0:
@@ -142,7 +149,7 @@ def animate_realtime(folder: Path, out_name: str = "animation_rt.mp4", fps: int
         if k >= len(times):
             return pos[-1], vel[-1]
         dt = t - times[k - 1]
-        pos_t = pos[k - 1] + vel[k - 1] * dt
+        pos_t = ballistic(pos[k - 1], vel[k - 1], dt, out=pos_buf)
         vel_t = vel[k - 1]
         return pos_t, vel_t
 
@@ -172,14 +179,21 @@ def animate_realtime(folder: Path, out_name: str = "animation_rt.mp4", fps: int
     plt.tight_layout()
     out_path = folder / out_name
     try:
-        writer = FFMpegWriter(fps=int(fps), bitrate=2400)
-        anim.save(out_path, writer=writer)
+        if out_path.suffix == ".gif":
+            writer = PillowWriter(fps=int(fps))
+        else:
+            writer = FFMpegWriter(fps=int(fps), bitrate=2400)
+        with stage("render", items=len(t_play)):
+            anim.save(out_path, writer=writer)
     except Exception as e:
         print("Warning: Could not export MP4 (ffmpeg missing?). Showing animation instead.", e)
-        plt.show()
+        if show:
+            plt.show()
         return
     print(f"Saved: {out_path}")
-    plt.show()
+    if show:
+        plt.show()
+    plt.close(fig)
 
 
 if __name__ == "__main__":
@@ -188,5 +202,12 @@ if __name__ == "__main__":
     parser.add_argument("--out", type=str, default="animation_rt.mp4")
     parser.add_argument("--fps", type=int, default=60)
     parser.add_argument("--speed", type=float, default=1.0, help="1.0 = real time, >1 faster, <1 slower")
+    parser.add_argument("--compact", choices=COMPACT_MODES, default=None,
+                        help="Keep positions as float32 or int32 fixed-point (less memory for long runs)")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Only render the first DURATION seconds of simulated time")
+    add_profile_arguments(parser)
     args = parser.parse_args()
-    animate_realtime(args.folder, args.out, fps=args.fps, speed=args.speed)
+    setup_profiling(args)
+    animate_realtime(args.folder, args.out, fps=args.fps, speed=args.speed, compact=args.compact,
+                     duration=args.duration)
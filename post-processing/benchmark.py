@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from synthetic_run import generate_run
+
+STAGES = ("read_dynamic", "load_run", "load_dynamic_parallel", "read_collision_events",
+          "compute_pressures_from_events", "compute_msd", "fits", "animation")
+
+
+def measure(fn, repeat: int):
+    """
+    Mejor tiempo de `repeat` llamadas y pico de memoria (MiB) de una llamada
+    aparte con tracemalloc, para que el rastreo no infle los tiempos.
+    Devuelve (resultado, {"seconds", "peak_mib"}).
+    """
+    best = np.inf
+    out = None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return out, {"seconds": best, "peak_mib": peak / 2**20}
+
+
+def run_case(folder: Path, repeat: int, anim_seconds: float, anim_fps: int) -> dict:
+    """Mide cada etapa del pipeline sobre una corrida; cada etapa usa la salida de la anterior."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import animation
+    from animate_sim_realtime import read_dynamic, animate_realtime
+    from pressure_core import (read_collision_events, compute_pressures_from_events,
+                               analytic_c_hat, build_error_curve, r2_score)
+    from diffusion_core import compute_msd, analytic_slope_origin, error_curve_for_slope_origin
+    from simulation_io import load_run, read_static
+    from parallel_loader import load_dynamic_parallel
+
+    N, L, R, M, V, T = read_static(folder / "static.txt")
+    dynamic_path = folder / "dynamic.txt"
+    res = {}
+
+    (times, pos, vel), res["read_dynamic"] = measure(lambda: read_dynamic(dynamic_path, N), repeat)
+    _, res["load_run"] = measure(lambda: load_run(dynamic_path, N), repeat)
+
+    def parallel():
+        # Los segmentos de shared memory se liberan en cada llamada
+        with load_dynamic_parallel(dynamic_path, N) as run:
+            return run.F
+    _, res["load_dynamic_parallel"] = measure(parallel, repeat)
+    ev, res["read_collision_events"] = measure(lambda: read_collision_events(dynamic_path, N), repeat)
+    _, res["compute_pressures_from_events"] = measure(
+        lambda: compute_pressures_from_events(ev[0], *ev[2:], N, L, R, M), repeat)
+    msd, res["compute_msd"] = measure(lambda: compute_msd(pos, ref_index=len(times) // 2), repeat)
+
+    # Ajustes por el origen de los scripts de regresión, sobre el MSD como datos
+    x = times - times[0]
+
+    def fits():
+        a_hat = analytic_slope_origin(x, msd)
+        error_curve_for_slope_origin(x, msd, np.linspace(0.0, 2.0 * a_hat, 400))
+        c_hat, _ = analytic_c_hat(x, msd)
+        build_error_curve(x, msd, num=400)
+        return r2_score(msd, c_hat * x)
+    _, res["fits"] = measure(fits, repeat)
+
+    # Exportación de una animación de largo fijo (GIF si no hay ffmpeg)
+    ext = ".mp4" if animation.writers.is_available("ffmpeg") else ".gif"
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / f"bench{ext}"
+        _, res["animation"] = measure(
+            lambda: animate_realtime(folder, str(out), fps=anim_fps, duration=anim_seconds, show=False), 1)
+    res["animation"]["format"] = ext[1:]
+    res["animation"]["frames"] = int(anim_seconds * anim_fps) + 1
+    return res
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(entry: dict, previous: dict | None):
+    """Imprime la tabla de la corrida actual y el cociente contra la anterior del historial."""
+    for case, stages in entry["cases"].items():
+        prev = (previous or {}).get("cases", {}).get(case, {})
+        print(f"\n{case}")
+        print(f"  {'etapa':32s} {'tiempo (s)':>12s} {'pico (MiB)':>12s} {'vs. anterior':>14s}")
+        for name in STAGES:
+            st = stages[name]
+            ratio = ""
+            if name in prev and prev[name]["seconds"] > 0:
+                ratio = f"x{st['seconds'] / prev[name]['seconds']:.2f}"
+            print(f"  {name:32s} {st['seconds']:12.4f} {st['peak_mib']:12.1f} {ratio:>14s}")
+        # La carga paralela no tiene que ser más lenta que la serie (con un solo CPU, a lo sumo igual)
+        par, ser = stages["load_dynamic_parallel"]["seconds"], stages["load_run"]["seconds"]
+        print(f"  load_dynamic_parallel / load_run: x{par / ser:.2f} ({entry.get('cpus')} CPU)")
+
+
+def main(sizes, history: Path, workdir: Path | None, repeat: int, anim_seconds: float, anim_fps: int,
+         label: str | None, seed: int):
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "label": label,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "cases": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = workdir if workdir is not None else Path(tmp)
+        for N, T in sizes:
+            case = f"N={N},T={T}"
+            folder = base / f"bench_N{N}_T{T}_s{seed}"
+            if not (folder / "dynamic.txt").exists():
+                print(f"Generando corrida sintética {case} en {folder}", flush=True)
+                generate_run(folder, N, T, seed=seed)
+            print(f"Midiendo {case}", flush=True)
+            entry["cases"][case] = run_case(folder, repeat, anim_seconds, anim_fps)
+
+    runs = json.loads(history.read_text()) if history.exists() else []
+    compare(entry, runs[-1] if runs else None)
+    runs.append(entry)
+    history.write_text(json.dumps(runs, indent=2))
+    print(f"\nGuardado: {history}")
+
+
+def parse_size(text: str):
+    try:
+        N, T = text.split(":")
+        return int(N), int(T)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"esperaba N:T, leí {text!r}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", type=parse_size, default=[(100, 5000), (300, 20000)],
+                    help="Casos N:T a generar y medir (default 100:5000 300:20000)")
+    ap.add_argument("--history", type=Path, default=Path("benchmark_history.json"),
+                    help="Archivo JSON donde se agrega cada medición (default benchmark_history.json)")
+    ap.add_argument("--workdir", type=Path, default=None,
+                    help="Carpeta para las corridas sintéticas; si se da, se reusan entre mediciones")
+    ap.add_argument("--repeat", type=int, default=3, help="Repeticiones por etapa, se toma la mejor (default 3)")
+    ap.add_argument("--anim-seconds", type=float, default=1.0,
+                    help="Segundos simulados de la animación de prueba (default 1 s)")
+    ap.add_argument("--anim-fps", type=int, default=30)
+    ap.add_argument("--label", type=str, default=None, help="Etiqueta libre para esta medición")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    main(args.sizes, args.history, args.workdir, args.repeat, args.anim_seconds, args.anim_fps,
+         args.label, args.seed)
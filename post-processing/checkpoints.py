@@ -0,0 +1,156 @@
+import argparse
+import json
+import shutil
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from simulation_io import read_static
+
+# Mismo formato que simulations.Checkpoint (DataOutputStream, big-endian)
+MAGIC = 0x53445343
+VERSION = 1
+HEADER = struct.Struct(">iiidqidqi")  # magic, version, N, L, seed, events, time, dynamicBytes, particulas
+PARTICLE = struct.Struct(">i?dddddd")  # id, fixed, r, m, x, y, vx, vy
+CHECKPOINT_FOLDER = "checkpoints"
+DEFAULT_JAR = Path(__file__).resolve().parent.parent / "simulations" / "target" / "simulations-1.0-SNAPSHOT.jar"
+
+
+def read_checkpoint(path: Path, with_particles: bool = False) -> dict:
+    """
+    Lee un checkpoint del motor. Sin `with_particles` sólo se lee el encabezado;
+    con él se agregan ids, fixed y el estado (r, m, x, y, vx, vy) de cada partícula.
+    """
+    with path.open("rb") as f:
+        head = f.read(HEADER.size)
+        if len(head) < HEADER.size:
+            raise ValueError(f"{path}: checkpoint truncado")
+        magic, version, N, L, seed, events, time, dynamic_bytes, count = HEADER.unpack(head)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: no es un checkpoint")
+        if version != VERSION:
+            raise ValueError(f"{path}: versión de checkpoint no soportada ({version})")
+        out = {"path": str(path), "N": N, "L": L, "seed": seed, "events": events, "time": time,
+               "dynamic_bytes": dynamic_bytes, "particles": count}
+        if with_particles:
+            body = f.read(PARTICLE.size * count)
+            if len(body) < PARTICLE.size * count:
+                raise ValueError(f"{path}: checkpoint truncado")
+            rows = list(PARTICLE.iter_unpack(body))
+            out["ids"] = [r[0] for r in rows]
+            out["fixed"] = [r[1] for r in rows]
+            out["state"] = [r[2:] for r in rows]
+    return out
+
+
+def list_checkpoints(folder: Path) -> list:
+    """Encabezados de los checkpoints de una corrida, del más viejo al más nuevo."""
+    files = sorted((folder / CHECKPOINT_FOLDER).glob("ckpt_*.bin"))
+    return [read_checkpoint(f) for f in files]
+
+
+def engine_root(folder: Path) -> Path:
+    """El motor escribe en data/simulations/<nombre> relativo a donde se lo ejecuta."""
+    folder = folder.resolve()
+    if folder.parent.name != "simulations" or folder.parent.parent.name != "data":
+        raise ValueError(f"{folder}: el motor sólo reanuda corridas en .../data/simulations/<nombre>")
+    return folder.parent.parent.parent
+
+
+def extend_run(folder: Path, T: int, jar: Path = DEFAULT_JAR, checkpoint_every: int | None = None,
+               java: str = "java") -> subprocess.CompletedProcess:
+    """Reanuda la corrida desde su último checkpoint hasta completar T eventos (agrega a dynamic.txt)."""
+    cmd = [java, "-jar", str(Path(jar).resolve()), "--resume", folder.resolve().name, str(T)]
+    if checkpoint_every is not None:
+        cmd += ["--checkpoint-every", str(checkpoint_every)]
+    return subprocess.run(cmd, cwd=engine_root(folder), capture_output=True, text=True)
+
+
+def main_list(folders, as_json: bool):
+    runs = {str(folder): list_checkpoints(folder) for folder in folders}
+    if as_json:
+        print(json.dumps(runs))
+        return
+    for folder, cks in runs.items():
+        T = read_static(Path(folder) / "static.txt")[5] if (Path(folder) / "static.txt").exists() else None
+        print(f"{folder} (T en static.txt = {T:g})" if T is not None else folder)
+        if not cks:
+            print("  sin checkpoints")
+        for ck in cks:
+            print(f"  {Path(ck['path']).name}  eventos = {ck['events']:>10d}  t = {ck['time']:12.4f} s  "
+                  f"dynamic.txt = {ck['dynamic_bytes'] / 2**20:9.1f} MiB  semilla = {ck['seed']}")
+
+
+def main_extend(folders, T: int, jar: Path, workers: int, checkpoint_every: int | None, as_json: bool):
+    results = {}
+    todo = []
+    for folder in folders:
+        # Se valida todo antes de lanzar procesos: un error dentro del pool cortaría
+        # también las corridas que sí se podían extender
+        try:
+            engine_root(folder)
+            if not (folder / "dynamic.txt").exists():
+                raise ValueError(f"{folder}: no existe dynamic.txt")
+            cks = list_checkpoints(folder)
+        except ValueError as exc:
+            results[str(folder)] = {"status": "error", "error": str(exc)}
+        else:
+            if not cks:
+                results[str(folder)] = {"status": "sin checkpoints"}
+            elif cks[-1]["events"] >= T:
+                results[str(folder)] = {"status": "ya completa", "events": cks[-1]["events"]}
+            else:
+                todo.append(folder)
+        if not as_json and str(folder) in results:
+            res = results[str(folder)]
+            print(f"{folder}: {res['status']}" + (f" ({res['error']})" if "error" in res else ""), flush=True)
+
+    if todo and shutil.which("java") is None:
+        raise SystemExit("No se encontró `java` en el PATH")
+    if todo and not Path(jar).exists():
+        raise SystemExit(f"No existe el jar del motor: {jar} (compilar con ./compile-sims-engine.sh)")
+
+    # Cada corrida es un proceso java aparte: alcanza con hilos para esperarlos
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        procs = ex.map(lambda folder: extend_run(folder, T, jar, checkpoint_every), todo)
+        for folder, proc in zip(todo, procs):
+            if proc.returncode == 0:
+                results[str(folder)] = {"status": "extendida", "events": T}
+            else:
+                results[str(folder)] = {"status": "error", "returncode": proc.returncode,
+                                        "stderr": proc.stderr.strip()}
+            if not as_json:
+                print(f"{folder}: {results[str(folder)]['status']}", flush=True)
+                if proc.returncode != 0:
+                    print(proc.stderr.strip())
+
+    if as_json:
+        print(json.dumps(results))
+    if any(res["status"] == "error" for res in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_list = sub.add_parser("list", help="Lista los checkpoints de cada corrida")
+    p_list.add_argument("folders", nargs="+", type=Path)
+    p_list.add_argument("--json", action="store_true", help="Imprime los encabezados como JSON")
+
+    p_ext = sub.add_parser("extend", help="Extiende corridas hasta T eventos desde su último checkpoint")
+    p_ext.add_argument("folders", nargs="+", type=Path, help="Carpetas data/simulations/<nombre>")
+    p_ext.add_argument("--T", type=int, required=True, help="Cantidad total de eventos a alcanzar")
+    p_ext.add_argument("--jar", type=Path, default=DEFAULT_JAR,
+                       help="Jar del motor (default simulations/target/simulations-1.0-SNAPSHOT.jar)")
+    p_ext.add_argument("--workers", type=int, default=1, help="Corridas extendidas en paralelo (default 1)")
+    p_ext.add_argument("--checkpoint-every", type=int, default=None,
+                       help="Eventos entre checkpoints al reanudar (default: el del motor)")
+    p_ext.add_argument("--json", action="store_true", help="Imprime el estado de cada corrida como JSON")
+    args = ap.parse_args()
+
+    if args.cmd == "list":
+        main_list(args.folders, args.json)
+    else:
+        main_extend(args.folders, args.T, args.jar, args.workers, args.checkpoint_every, args.json)
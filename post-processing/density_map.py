@@ -0,0 +1,192 @@
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+
+from simulation_io import ENC, DEFAULT_CHUNK_FRAMES, read_static, iter_dynamic_chunks
+from pressure_core import detect_equilibration
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
+
+
+def domain_mask(x_edges: np.ndarray, y_edges: np.ndarray, L: float) -> np.ndarray:
+    """(ny, nx) True donde el centro de la celda cae dentro del recinto + canal."""
+    xc = 0.5 * (x_edges[:-1] + x_edges[1:])
+    yc = 0.5 * (y_edges[:-1] + y_edges[1:])
+    X, Y = np.meshgrid(xc, yc)
+    y0 = (ENC - L) / 2.0
+    y1 = y0 + L
+    return (X < ENC) | ((Y >= y0) & (Y <= y1))
+
+
+def _frame_blocks(dynamic_path: Path, N: int, tmax: float, chunk_frames: int):
+    """
+    Recorre dynamic.txt por bloques y devuelve (t_start, t_next, pos) de cada frame:
+    el frame vale desde su tiempo hasta el del evento siguiente. El último frame de
+    cada bloque queda pendiente hasta conocer el primer tiempo del bloque siguiente.
+    """
+    pending_t = None
+    pending_pos = None
+    for chunk in iter_dynamic_chunks(dynamic_path, N, chunk_frames):
+        if pending_t is not None:
+            yield np.array([pending_t]), chunk.times[:1], pending_pos[None]
+        if len(chunk.times) > 1:
+            yield chunk.times[:-1], chunk.times[1:], chunk.pos[:-1]
+        pending_t = float(chunk.times[-1])
+        pending_pos = chunk.pos[-1].copy()
+        if pending_t >= tmax:
+            break
+
+
+def _clip_weights(t_start, t_next, lo: float, hi: float):
+    """Duración de cada frame dentro de [lo, hi] y máscara de los que la tocan."""
+    w = np.minimum(t_next, hi) - np.maximum(t_start, lo)
+    keep = w > 0
+    return w[keep], keep
+
+
+def left_fraction_series(dynamic_path: Path, N: int, tmax: float = np.inf,
+                         chunk_frames: int = DEFAULT_CHUNK_FRAMES, dt_bin: float = 1.0):
+    """
+    Fracción de partículas en el recinto izquierdo promediada en el tiempo por bin
+    de dt_bin segundos. Sólo guarda dos escalares por bin, así que la memoria no
+    depende de la resolución del mapa. Devuelve (inicio de cada bin, fracción).
+    """
+    bins = {}  # bin -> [tiempo, tiempo * fracción en el recinto izquierdo]
+    t0 = None
+    for t_start, t_next, pos in _frame_blocks(dynamic_path, N, tmax, chunk_frames):
+        if t0 is None:
+            t0 = float(t_start[0])
+        frac = np.count_nonzero(pos[:, :, 0] < ENC, axis=1) / pos.shape[1]
+        # Los bins que toca el bloque; cada uno recorta los frames a su intervalo
+        first = int((t_start[0] - t0) // dt_bin)
+        last = int((min(float(t_next[-1]), tmax) - t0) // dt_bin)
+        for k in range(first, last + 1):
+            lo = t0 + k * dt_bin
+            w, keep = _clip_weights(t_start, t_next, lo, min(lo + dt_bin, tmax))
+            if w.size:
+                rec = bins.setdefault(k, [0.0, 0.0])
+                rec[0] += float(w.sum())
+                rec[1] += float(np.dot(w, frac[keep]))
+    if t0 is None:
+        return np.zeros(0), np.zeros(0)
+    ks = np.array([k for k in sorted(bins) if bins[k][0] > 0], dtype=int)
+    return t0 + ks * dt_bin, np.array([bins[k][1] / bins[k][0] for k in ks])
+
+
+def compute_density(dynamic_path: Path, N: int, nx: int, ny: int,
+                    tmin: float | None = None, tmax: float = np.inf,
+                    chunk_frames: int = DEFAULT_CHUNK_FRAMES, dt_bin: float = 1.0):
+    """
+    Densidad numérica promediada en el tiempo sobre [tmin, tmax]:
+      - Cada frame pesa lo que dura hasta el evento siguiente (recortado a la ventana),
+        que es el tiempo durante el cual las partículas están cerca de esa posición.
+      - Las posiciones se binean con np.bincount sobre el índice plano iy * nx + ix.
+    Con tmin=None el inicio se detecta con MSER (detect_equilibration, igual que en
+    las presiones) sobre left_fraction_series, en una primera pasada por el archivo;
+    la segunda acumula un único histograma desde ese tiempo.
+    Devuelve (density (ny, nx) en part./m^2, x_edges, y_edges, tiempo total promediado, tmin usado).
+    """
+    x_edges = np.linspace(0.0, 2 * ENC, nx + 1)
+    y_edges = np.linspace(0.0, ENC, ny + 1)
+    if tmin is None:
+        t_bins, frac_left = left_fraction_series(dynamic_path, N, tmax, chunk_frames, dt_bin)
+        tmin = detect_equilibration(t_bins, frac_left)
+
+    acc = np.zeros(nx * ny)
+    total_w = 0.0
+    for t_start, t_next, pos in _frame_blocks(dynamic_path, N, tmax, chunk_frames):
+        if t_next[-1] <= tmin:
+            continue
+        w, keep = _clip_weights(t_start, t_next, tmin, tmax)
+        if not w.size:
+            continue
+        p = pos[keep]
+        ix = np.clip((p[:, :, 0] * (nx / (2 * ENC))).astype(np.int64), 0, nx - 1)
+        iy = np.clip((p[:, :, 1] * (ny / ENC)).astype(np.int64), 0, ny - 1)
+        cell = (iy * nx + ix).ravel()
+        acc += np.bincount(cell, weights=np.repeat(w, p.shape[1]), minlength=nx * ny)
+        total_w += float(w.sum())
+    if total_w <= 0:
+        raise ValueError(f"No hay frames dentro de la ventana [{tmin}, {tmax}].")
+
+    cell_area = (2 * ENC / nx) * (ENC / ny)
+    density = acc.reshape(ny, nx) / (total_w * cell_area)
+    return density, x_edges, y_edges, total_w, tmin
+
+
+def plot_density(density, x_edges, y_edges, L: float, out_png: Path):
+    import matplotlib.pyplot as plt
+    from animate_sim_realtime import create_axes
+
+    shown = np.where(domain_mask(x_edges, y_edges, L), density, np.nan)
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    create_axes(ax, L, facecolor="none")
+    im = ax.imshow(shown, origin="lower", cmap="viridis", interpolation="nearest",
+                   extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]), zorder=0)
+    cb = fig.colorbar(im, ax=ax, fraction=0.025, pad=0.02)
+    cb.set_label("Densidad (part./m$^2$)", fontsize=14)
+    cb.ax.tick_params(labelsize=12)
+    plt.tight_layout()
+    fig.savefig(out_png, dpi=200)
+    print(f"Guardado: {out_png}")
+    plt.show()
+
+
+def main(folder: Path, nx: int, ny: int, tmin: float | None, tmax: float, chunk_frames: int,
+         dt_bin: float = 1.0, plot: bool = True, as_json: bool = False):
+    static_path = folder / "static.txt"
+    dynamic_path = folder / "dynamic.txt"
+
+    if not static_path.exists() or not dynamic_path.exists():
+        raise FileNotFoundError(f"Faltan static.txt o dynamic.txt en {folder}")
+
+    N, L, R, M, V, T = read_static(static_path)
+    density, x_edges, y_edges, t_win, t_eq = compute_density(
+        dynamic_path, N, nx, ny, tmin=tmin, tmax=tmax, chunk_frames=chunk_frames, dt_bin=dt_bin
+    )
+
+    out_npz = folder / "density.npz"
+    np.savez(out_npz, density=density, x_edges=x_edges, y_edges=y_edges, tmin=t_eq, t_window=t_win)
+
+    if as_json:
+        inside = domain_mask(x_edges, y_edges, L)
+        print(json.dumps({
+            "folder": str(folder), "N": N, "L": L, "nx": nx, "ny": ny,
+            "tmin": t_eq, "tmin_auto": tmin is None, "t_window": t_win, "density_file": str(out_npz),
+            "density_max": float(density.max()), "density_mean": float(density[inside].mean()),
+        }))
+        return
+
+    print(f"Régimen desde t = {t_eq:.3f} s" + (" (detectado con MSER)" if tmin is None else ""))
+    print(f"Ventana promediada: {t_win:.3f} s")
+    print(f"Guardado: {out_npz}")
+    if plot:
+        with stage("graficos"):
+            plot_density(density, x_edges, y_edges, L, folder / "density.png")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder", type=Path, help="Carpeta con static.txt y dynamic.txt")
+    ap.add_argument("--nx", type=int, default=120, help="Celdas en x sobre [0, 2·ENC] (default 120)")
+    ap.add_argument("--ny", type=int, default=60, help="Celdas en y sobre [0, ENC] (default 60)")
+    ap.add_argument("--tmin", type=float, default=None,
+                    help="Inicio de la ventana de régimen "
+                         "(default: tiempo de equilibración detectado con MSER)")
+    ap.add_argument("--tmax", type=float, default=np.inf,
+                    help="Fin de la ventana (default: hasta el último evento)")
+    ap.add_argument("--dt-bin", type=float, default=1.0,
+                    help="Ancho de los bins de la detección automática de tmin (default 1 s)")
+    ap.add_argument("--chunk-frames", type=int, default=DEFAULT_CHUNK_FRAMES,
+                    help="Frames leídos por bloque (acota la memoria usada)")
+    ap.add_argument("--no-plot", action="store_true",
+                    help="Sólo guarda density.npz, sin renderizar la imagen (modo batch)")
+    ap.add_argument("--json", action="store_true",
+                    help="Imprime un resumen como JSON (implica --no-plot)")
+    add_profile_arguments(ap)
+    args = ap.parse_args()
+    setup_profiling(args)
+    main(args.folder, args.nx, args.ny, args.tmin, args.tmax, args.chunk_frames, args.dt_bin,
+         plot=not args.no_plot, as_json=args.json)
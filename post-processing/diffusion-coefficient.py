@@ -1,84 +1,22 @@
 import argparse
+import json
 from pathlib import Path
-from typing import List, Tuple
 
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.ticker import ScalarFormatter
-
-def read_static(static_path: Path) -> Tuple[int, float, float, float, float, float]:
-    with static_path.open("r") as f:
-        N = int(f.readline().strip())
-        L = float(f.readline().strip())
-        R = float(f.readline().strip())
-        M = float(f.readline().strip())
-        V = float(f.readline().strip())
-        T = float(f.readline().strip())
-    return N, L, R, M, V, T
-
-
-def read_dynamic_positions(dynamic_path: Path, N: int) -> Tuple[np.ndarray, np.ndarray]:
-    with dynamic_path.open("r") as f:
-        lines = f.readlines()
-
-    times: List[float] = []
-    positions: List[np.ndarray] = []
-
-    i = 0
-    while i < len(lines):
-        head = lines[i].strip()
-        if not head:
-            i += 1
-            continue
-        toks = head.split()
-        t = float(toks[0])
-        i += 1
-
-        frame_pos = np.zeros((N, 2), dtype=float)
-        for p in range(N):
-            parts = lines[i].split()
-            if len(parts) == 4:
-                x, y, vx, vy = map(float, parts)
-            elif len(parts) == 5:
-                _, x, y, vx, vy = parts
-                x, y, vx, vy = map(float, (x, y, vx, vy))
-            frame_pos[p, 0] = x
-            frame_pos[p, 1] = y
-            i += 1
-
-        times.append(t)
-        positions.append(frame_pos)
-
-    return np.array(times, dtype=float), np.stack(positions)
-
-def compute_msd(positions: np.ndarray, ref_index: int = 0) -> np.ndarray:
-    r0 = positions[ref_index]
-    disp = positions - r0
-    sq = np.sum(disp * disp, axis=2)
-    msd = np.mean(sq, axis=1)
-    return msd
-
-
-def error_curve_for_slope_origin(x: np.ndarray, y: np.ndarray, a_grid: np.ndarray) -> np.ndarray:
-    Syy = float(np.sum(y * y))
-    Sxy = float(np.sum(x * y))
-    Sxx = float(np.sum(x * x))
-    return Syy - 2.0 * a_grid * Sxy + (a_grid * a_grid) * Sxx
-
-
-def analytic_slope_origin(x: np.ndarray, y: np.ndarray) -> float:
-    Sxx = float(np.sum(x * x))
-    Sxy = float(np.sum(x * y))
-    return 0.0 if Sxx == 0.0 else Sxy / Sxx
-
-
-def r2_score(y: np.ndarray, y_hat: np.ndarray) -> float:
-    ss_res = float(np.sum((y - y_hat) ** 2))
-    ss_tot = float(np.sum((y - np.mean(y)) ** 2))
-    return 1.0 - ss_res / ss_tot if ss_tot > 0 else np.nan
 
+from diffusion_core import (
+    read_dynamic_positions,
+    compute_msd,
+    error_curve_for_slope_origin,
+    analytic_slope_origin,
+    r2_score,
+)
+from simulation_io import COMPACT_MODES, load_run, read_static, served_run
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
 
 def sci_formatter():
+    from matplotlib.ticker import ScalarFormatter
+
     fmt = ScalarFormatter(useMathText=True)
     fmt.set_scientific(True)
     fmt.set_powerlimits((0, 0))
@@ -90,42 +28,14 @@ def format_sci_base10(val: float, prec: int = 2) -> str:
     exp = int(exp)
     return f"${base} \\times 10^{{{exp}}}$"
 
-def main(folder: Path, t0_abs: float, tmin: float, tmax: float, dim: int,
-         a_min: float | None, a_max: float | None, ngrid: int):
-    static_path = folder / "static.txt"
-    dynamic_path = folder / "dynamic.txt"
-    N, L, R, M, V, T = read_static(static_path)
-    times_abs, positions = read_dynamic_positions(dynamic_path, N)
-
-    i0 = int(np.where(times_abs >= float(t0_abs))[0][0])
-    times = times_abs - times_abs[i0]
-    msd = compute_msd(positions, ref_index=i0)
-
-    mask = (times >= tmin) & (times <= tmax)
-    x = times[mask].astype(float)
-    y = msd[mask].astype(float)
-
-    a_hat = analytic_slope_origin(x, y)
-    if a_min is None or a_max is None:
-        span = 3.0 * abs(a_hat) if abs(a_hat) > 0 else 1.0
-        a_min, a_max = a_hat - span, a_hat + span
-
-    a_grid = np.linspace(float(a_min), float(a_max), int(ngrid))
-    E_grid = error_curve_for_slope_origin(x, y, a_grid)
-    idx_min = int(np.argmin(E_grid))
-    a_min_grid = float(a_grid[idx_min])
-
-    y_hat = a_hat * x
-    D = a_hat / (2.0 * float(dim))
-
-    # Imprimir coeficiente de difusión (en m^2/s) sin alterar gráficos
-    print(f"Coeficiente de difusión (D): {D:.6e} m^2/s")
+def plot_diffusion(a_grid, E_grid, a_hat, a_min_grid, E_min, x, y):
+    import matplotlib.pyplot as plt
 
     # Gráfico 1: Curva de error 
     plt.figure(figsize=(7.4, 4.8))
     plt.plot(a_grid, E_grid, '-', lw=2)
     plt.axvline(a_hat, ls='--', color='C1', label=f'a* = {format_sci_base10(a_hat, prec=2)}')
-    plt.plot(a_min_grid, E_grid[idx_min], 'o', color='C1', markersize=8)
+    plt.plot(a_min_grid, E_min, 'o', color='C1', markersize=8)
 
     ax_err = plt.gca()
     ax_err.xaxis.set_major_formatter(sci_formatter())
@@ -160,6 +70,66 @@ def main(folder: Path, t0_abs: float, tmin: float, tmax: float, dim: int,
     plt.tight_layout()
     plt.show()
 
+def msd_from_t0(times_abs: np.ndarray, positions, t0_abs: float):
+    """Índice del primer frame con t >= t0_abs y MSD con referencia en él."""
+    i0 = int(np.where(times_abs >= float(t0_abs))[0][0])
+    return i0, compute_msd(positions, ref_index=i0)
+
+def main(folder: Path, t0_abs: float, tmin: float, tmax: float, dim: int,
+         a_min: float | None, a_max: float | None, ngrid: int,
+         plot: bool = True, as_json: bool = False, compact: str | None = None):
+    static_path = folder / "static.txt"
+    dynamic_path = folder / "dynamic.txt"
+    N, L, R, M, V, T = read_static(static_path)
+    run = served_run(folder)
+    if run is not None:
+        # Los segmentos del servidor se sueltan apenas está el MSD
+        with run:
+            times_abs = np.array(run.times)
+            i0, msd = msd_from_t0(times_abs, run.pos, t0_abs)
+    else:
+        if compact is not None:
+            loaded = load_run(dynamic_path, N, compact=compact, with_vel=False)
+            times_abs, positions = loaded.times, loaded.pos
+        else:
+            times_abs, positions = read_dynamic_positions(dynamic_path, N)
+        i0, msd = msd_from_t0(times_abs, positions, t0_abs)
+    times = times_abs - times_abs[i0]
+
+    mask = (times >= tmin) & (times <= tmax)
+    x = times[mask].astype(float)
+    y = msd[mask].astype(float)
+
+    with stage("ajuste", items=x.size):
+        a_hat = analytic_slope_origin(x, y)
+        if a_min is None or a_max is None:
+            span = 3.0 * abs(a_hat) if abs(a_hat) > 0 else 1.0
+            a_min, a_max = a_hat - span, a_hat + span
+
+        a_grid = np.linspace(float(a_min), float(a_max), int(ngrid))
+        E_grid = error_curve_for_slope_origin(x, y, a_grid)
+    idx_min = int(np.argmin(E_grid))
+    a_min_grid = float(a_grid[idx_min])
+
+    y_hat = a_hat * x
+    D = a_hat / (2.0 * float(dim))
+
+    if as_json:
+        print(json.dumps({
+            "folder": str(folder), "N": N, "L": L, "t0": float(times_abs[i0]),
+            "tmin": tmin, "tmax": tmax, "dim": dim,
+            "a_hat": a_hat, "D": D, "R2": r2_score(y, y_hat), "n_points": int(x.size),
+        }))
+        return
+
+    # Imprimir coeficiente de difusión (en m^2/s) sin alterar gráficos
+    print(f"Coeficiente de difusión (D): {D:.6e} m^2/s")
+
+    if plot:
+        with stage("graficos"):
+            plot_diffusion(a_grid, E_grid, a_hat, a_min_grid, E_grid[idx_min], x, y)
+
+
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("folder", type=Path)
@@ -170,5 +140,13 @@ if __name__ == "__main__":
     ap.add_argument("--amin", type=float, default=None)
     ap.add_argument("--amax", type=float, default=None)
     ap.add_argument("--ngrid", type=int, default=400)
+    ap.add_argument("--no-plot", action="store_true", help="No abre gráficos (modo batch)")
+    ap.add_argument("--json", action="store_true",
+                    help="Imprime D, a* y R² como JSON (implica --no-plot)")
+    ap.add_argument("--compact", choices=COMPACT_MODES, default=None,
+                    help="Guarda las posiciones en float32 o en punto fijo int32 (menos memoria)")
+    add_profile_arguments(ap)
     args = ap.parse_args()
-    main(args.folder, args.t0, args.tmin, args.tmax, args.dim, args.amin, args.amax, args.ngrid)
+    setup_profiling(args)
+    main(args.folder, args.t0, args.tmin, args.tmax, args.dim, args.amin, args.amax, args.ngrid,
+         plot=not args.no_plot, as_json=args.json, compact=args.compact)
@@ -0,0 +1,98 @@
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+from profiling import stage
+
+def read_dynamic_positions(dynamic_path: Path, N: int) -> Tuple[np.ndarray, np.ndarray]:
+    with dynamic_path.open("r") as f, stage("lectura"):
+        lines = f.readlines()
+
+    times: List[float] = []
+    positions: List[np.ndarray] = []
+
+    with stage("tokenizado") as st:
+        i = 0
+        while i < len(lines):
+            head = lines[i].strip()
+            if not head:
+                i += 1
+                continue
+            toks = head.split()
+            t = float(toks[0])
+            i += 1
+
+            frame_pos = np.zeros((N, 2), dtype=float)
+            for p in range(N):
+                parts = lines[i].split()
+                if len(parts) == 4:
+                    x, y, vx, vy = map(float, parts)
+                elif len(parts) == 5:
+                    _, x, y, vx, vy = parts
+                    x, y, vx, vy = map(float, (x, y, vx, vy))
+                frame_pos[p, 0] = x
+                frame_pos[p, 1] = y
+                i += 1
+
+            times.append(t)
+            positions.append(frame_pos)
+        st.add(len(times))
+
+    return np.array(times, dtype=float), np.stack(positions)
+
+def compute_msd(positions: np.ndarray, ref_index: int = 0, chunk_frames: int = 1024) -> np.ndarray:
+    # Por bloques de frames: acepta posiciones compactas (float32 / punto fijo)
+    # y sólo decodifica a float64 un bloque a la vez
+    r0 = np.asarray(positions[ref_index], dtype=float)
+    F = len(positions)
+    msd = np.empty(F)
+    with stage("msd", items=F):
+        for a in range(0, F, chunk_frames):
+            disp = np.asarray(positions[a:a + chunk_frames], dtype=float) - r0
+            sq = np.sum(disp * disp, axis=2)
+            msd[a:a + chunk_frames] = np.mean(sq, axis=1)
+    return msd
+
+
+def error_curve_for_slope_origin(x: np.ndarray, y: np.ndarray, a_grid: np.ndarray) -> np.ndarray:
+    Syy = float(np.sum(y * y))
+    Sxy = float(np.sum(x * y))
+    Sxx = float(np.sum(x * x))
+    return Syy - 2.0 * a_grid * Sxy + (a_grid * a_grid) * Sxx
+
+
+def analytic_slope_origin(x: np.ndarray, y: np.ndarray) -> float:
+    Sxx = float(np.sum(x * x))
+    Sxy = float(np.sum(x * y))
+    return 0.0 if Sxx == 0.0 else Sxy / Sxx
+
+
+def sliding_slope_origin(x: np.ndarray, y: np.ndarray, width: float):
+    """
+    Pendiente por el origen a = Sxy / Sxx (misma forma cerrada que
+    analytic_slope_origin) sobre cada ventana [x_i, x_i + width], una por muestra.
+    Sxx, Sxy y Syy de cada ventana salen de diferencias de sumas acumuladas, así
+    que todas las ventanas cuestan O(F) más un searchsorted.
+    Devuelve (x_start, a, error residual Syy - a Sxy, puntos por ventana).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    Cxx = np.concatenate([[0.0], np.cumsum(x * x)])
+    Cxy = np.concatenate([[0.0], np.cumsum(x * y)])
+    Cyy = np.concatenate([[0.0], np.cumsum(y * y)])
+    i = np.arange(x.size)
+    j = np.searchsorted(x, x + width, side="right")
+    Sxx = Cxx[j] - Cxx[i]
+    Sxy = Cxy[j] - Cxy[i]
+    Syy = Cyy[j] - Cyy[i]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        a = np.where(Sxx > 0.0, Sxy / Sxx, 0.0)
+    sse = np.maximum(Syy - a * Sxy, 0.0)
+    return x, a, sse, j - i
+
+
+def r2_score(y: np.ndarray, y_hat: np.ndarray) -> float:
+    ss_res = float(np.sum((y - y_hat) ** 2))
+    ss_tot = float(np.sum((y - np.mean(y)) ** 2))
+    return 1.0 - ss_res / ss_tot if ss_tot > 0 else np.nan
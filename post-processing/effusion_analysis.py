@@ -0,0 +1,158 @@
+import argparse
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+
+from simulation_io import ENC, DEFAULT_CHUNK_FRAMES, read_static, iter_dynamic_chunks
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
+
+
+def _bin_add(acc: np.ndarray, bins: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Suma `weights` en `acc[bins]`, agrandando `acc` si hace falta."""
+    if bins.size == 0:
+        return acc
+    part = np.bincount(bins, weights=weights)
+    if part.size > acc.size:
+        acc = np.concatenate([acc, np.zeros(part.size - acc.size)])
+    acc[:part.size] += part
+    return acc
+
+
+def compute_occupancy(dynamic_path: Path, N: int, dt_bin: float = 1.0,
+                      chunk_frames: int = DEFAULT_CHUNK_FRAMES):
+    """
+    Ocupación del recinto izquierdo y cruces por el cuello, frame a frame:
+      - Una partícula está en el recinto izquierdo si x < ENC (misma geometría que
+        classify_wall_and_recinto); en otro caso está en el canal / lado derecho.
+      - Un cruce es un cambio de lado entre dos frames consecutivos y se asigna al
+        tiempo del frame donde se observa.
+      - Se procesa bloque a bloque: sólo se arrastra el lado de cada partícula en el
+        último frame del bloque anterior.
+
+    Devuelve (times, frac_left) por frame y (t_mid, frac_left_bin, n_lr, n_rl, flux)
+    por bin de ancho dt_bin, con flux = (n_lr - n_rl) / dt_bin (positivo = izq -> der).
+    """
+    times_all = []
+    frac_all = []
+    acc_frac = np.zeros(0)
+    acc_cnt = np.zeros(0)
+    acc_lr = np.zeros(0)
+    acc_rl = np.zeros(0)
+    prev_right = None
+    t0 = None
+
+    for chunk in iter_dynamic_chunks(dynamic_path, N, chunk_frames):
+        if t0 is None:
+            t0 = float(chunk.times[0])
+        right = chunk.pos[:, :, 0] >= ENC
+        frac_left = 1.0 - right.mean(axis=1) if N > 0 else np.zeros(len(chunk.times))
+
+        if prev_right is None:
+            before = np.vstack([right[:1], right[:-1]])
+        else:
+            before = np.vstack([prev_right[None, :], right[:-1]])
+        n_lr = np.count_nonzero(~before & right, axis=1)
+        n_rl = np.count_nonzero(before & ~right, axis=1)
+        prev_right = right[-1]
+
+        b = np.floor((chunk.times - t0) / dt_bin).astype(int)
+        acc_frac = _bin_add(acc_frac, b, frac_left)
+        acc_cnt = _bin_add(acc_cnt, b, np.ones_like(frac_left))
+        acc_lr = _bin_add(acc_lr, b, n_lr.astype(float))
+        acc_rl = _bin_add(acc_rl, b, n_rl.astype(float))
+
+        times_all.append(chunk.times)
+        frac_all.append(frac_left)
+
+    if t0 is None:
+        raise ValueError("dynamic.txt no tiene frames.")
+
+    nbins = acc_cnt.size
+    edges = t0 + np.arange(nbins + 1) * dt_bin
+    t_mid = 0.5 * (edges[:-1] + edges[1:])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        frac_bin = acc_frac / acc_cnt
+    flux = (acc_lr - acc_rl) / dt_bin
+
+    times = np.concatenate(times_all)
+    frac_left = np.concatenate(frac_all)
+    return times, frac_left, t_mid, frac_bin, acc_lr.astype(int), acc_rl.astype(int), flux
+
+
+def plot_occupancy(times, frac_left, t_mid, frac_bin, flux, dt_bin):
+    import matplotlib.pyplot as plt
+
+    # Gráfico 1: fracción de partículas en el recinto izquierdo
+    plt.figure(figsize=(12, 6))
+    plt.plot(times, frac_left, lw=0.8, color="C0", alpha=0.4, label="Por evento")
+    plt.plot(t_mid, frac_bin, lw=2.0, color="C0", label=f"Promedio (Δt = {dt_bin:g} s)")
+    plt.xlabel("Tiempo (s)", fontsize=20)
+    plt.ylabel("Fracción en recinto izquierdo", fontsize=20)
+    plt.legend(fontsize=20, frameon=False)
+    plt.grid(True, ls=":", alpha=0.6)
+    plt.tick_params(axis="both", labelsize=20)
+    plt.tight_layout()
+    plt.show()
+
+    # Gráfico 2: flujo neto por el cuello
+    plt.figure(figsize=(12, 6))
+    plt.step(t_mid, flux, where="mid", lw=2.0, color="C1")
+    plt.axhline(0.0, color="k", lw=1.0, alpha=0.6)
+    plt.xlabel("Tiempo (s)", fontsize=20)
+    plt.ylabel("Flujo neto (part./s)", fontsize=20)
+    plt.grid(True, ls=":", alpha=0.6)
+    plt.tick_params(axis="both", labelsize=20)
+    plt.tight_layout()
+    plt.show()
+
+
+def main(folder: Path, dt_bin: float, chunk_frames: int, plot: bool = True, as_json: bool = False):
+    static_path = folder / "static.txt"
+    dynamic_path = folder / "dynamic.txt"
+
+    if not static_path.exists() or not dynamic_path.exists():
+        raise FileNotFoundError(f"Faltan static.txt o dynamic.txt en {folder}")
+
+    N, L, R, M, V, T = read_static(static_path)
+    times, frac_left, t_mid, frac_bin, n_lr, n_rl, flux = compute_occupancy(
+        dynamic_path, N, dt_bin=dt_bin, chunk_frames=chunk_frames
+    )
+
+    out_csv = folder / "occupancy.csv"
+    with out_csv.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["t", "frac_left", "cross_LR", "cross_RL", "flux"])
+        for tc, fl, a, b, q in zip(t_mid, frac_bin, n_lr, n_rl, flux):
+            w.writerow([f"{tc:.6f}", f"{fl:.6f}", int(a), int(b), f"{q:.6e}"])
+
+    if as_json:
+        print(json.dumps({
+            "folder": str(folder), "N": N, "L": L, "dt_bin": dt_bin,
+            "cross_LR": int(n_lr.sum()), "cross_RL": int(n_rl.sum()),
+            "t": t_mid.tolist(), "frac_left": frac_bin.tolist(), "flux": flux.tolist(),
+        }))
+        return
+
+    print(f"Cruces izq->der: {int(n_lr.sum())}, der->izq: {int(n_rl.sum())}")
+    print(f"Guardado: {out_csv}")
+    if plot:
+        with stage("graficos"):
+            plot_occupancy(times, frac_left, t_mid, frac_bin, flux, dt_bin)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder", type=Path, help="Carpeta con static.txt y dynamic.txt")
+    ap.add_argument("--dt-bin", type=float, default=1.0,
+                    help="Ancho del bin temporal para el flujo neto (default 1 s)")
+    ap.add_argument("--chunk-frames", type=int, default=DEFAULT_CHUNK_FRAMES,
+                    help="Frames leídos por bloque (acota la memoria usada)")
+    ap.add_argument("--no-plot", action="store_true", help="No abre gráficos (modo batch)")
+    ap.add_argument("--json", action="store_true",
+                    help="Imprime cruces, fracción y flujo por bin como JSON (implica --no-plot)")
+    add_profile_arguments(ap)
+    args = ap.parse_args()
+    setup_profiling(args)
+    main(args.folder, args.dt_bin, args.chunk_frames, plot=not args.no_plot, as_json=args.json)
@@ -0,0 +1,240 @@
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from simulation_io import DEFAULT_CHUNK_FRAMES, read_static, iter_dynamic_chunks
+from streaming_stats import WelfordStats
+from diffusion_core import analytic_slope_origin
+from pressure_core import compute_pressures_from_events
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
+
+CURVES = ("P", "P_left", "P_right", "MSD")
+
+
+def resample(x: np.ndarray, y: np.ndarray, step: float, offset: float = 0.0) -> np.ndarray:
+    """y interpolado en la grilla offset + k * step (k = 0, 1, ...) hasta x[-1]; NaN antes de x[0]."""
+    if x.size == 0 or x[-1] < offset:
+        return np.zeros(0)
+    grid = offset + np.arange(int(np.floor((x[-1] - offset) / step)) + 1) * step
+    out = np.interp(grid, x, y)
+    out[grid < x[0]] = np.nan
+    return out
+
+
+def run_curves(folder: Path, t0: float, dt_p: float, dt_msd: float,
+               chunk_frames: int = DEFAULT_CHUNK_FRAMES):
+    """
+    Recorre dynamic.txt de una corrida una sola vez, bloque a bloque, y devuelve
+    las curvas remuestreadas en grillas comunes:
+      - P, P_left, P_right en los centros (k + 1/2) * dt_p,
+      - MSD en lags k * dt_msd con referencia en el primer frame con t >= t0.
+    Sólo se guardan los eventos de borde y un escalar de MSD por frame, nunca
+    todas las posiciones.
+    """
+    N, L, R, M, V, T = read_static(folder / "static.txt")
+    times_ev, X, Y, VX, VY = [], [], [], [], []
+    tau, msd = [], []
+    r0 = None
+    t_ref = None
+
+    for chunk in iter_dynamic_chunks(folder / "dynamic.txt", N, chunk_frames):
+        times_ev.append(chunk.times[chunk.ev_frame])
+        X.append(chunk.pos[chunk.ev_frame, chunk.ev_idx, 0])
+        Y.append(chunk.pos[chunk.ev_frame, chunk.ev_idx, 1])
+        VX.append(chunk.vel[chunk.ev_frame, chunk.ev_idx, 0])
+        VY.append(chunk.vel[chunk.ev_frame, chunk.ev_idx, 1])
+
+        k = 0
+        if r0 is None:
+            k = int(np.searchsorted(chunk.times, t0, side="left"))
+            if k >= len(chunk.times):
+                continue
+            r0 = chunk.pos[k].copy()
+            t_ref = float(chunk.times[k])
+        disp = chunk.pos[k:] - r0
+        msd.append(np.mean(np.sum(disp * disp, axis=2), axis=1))
+        tau.append(chunk.times[k:] - t_ref)
+
+    if r0 is None:
+        raise ValueError(f"{folder}: no hay frames con t >= t0 = {t0:g} s")
+
+    t, P_L, P_R = compute_pressures_from_events(
+        np.concatenate(times_ev), np.concatenate(X), np.concatenate(Y),
+        np.concatenate(VX), np.concatenate(VY), N, L, R, M
+    )
+    t, P_L, P_R = t[:-1], P_L[:-1], P_R[:-1]
+    curves = {
+        "P": resample(t, 0.5 * (P_L + P_R), dt_p, 0.5 * dt_p),
+        "P_left": resample(t, P_L, dt_p, 0.5 * dt_p),
+        "P_right": resample(t, P_R, dt_p, 0.5 * dt_p),
+        "MSD": resample(np.concatenate(tau), np.concatenate(msd), dt_msd),
+    }
+    return L, curves
+
+
+def aggregate(folders, t0: float, dt_p: float, dt_msd: float, chunk_frames: int):
+    """Worker: suma un grupo de corridas en acumuladores de Welford parciales."""
+    stats = {name: WelfordStats() for name in CURVES}
+    Ls = set()
+    for folder in folders:
+        L, curves = run_curves(Path(folder), t0, dt_p, dt_msd, chunk_frames)
+        Ls.add(L)
+        for name, y in curves.items():
+            stats[name].update(y)
+    return stats, Ls
+
+
+def ensemble(folders, t0: float, dt_p: float, dt_msd: float, workers: int | None = None,
+             chunk_frames: int = DEFAULT_CHUNK_FRAMES):
+    """
+    Promedio de ensamble de P(t) y MSD(τ) sobre corridas independientes con el mismo L.
+    Las corridas se reparten en `workers` grupos; cada proceso devuelve sus
+    acumuladores parciales y acá se combinan con WelfordStats.merge.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(folders)))
+    groups = [folders[j::workers] for j in range(workers)]
+    stats = {name: WelfordStats() for name in CURVES}
+    Ls = set()
+
+    def absorb(result):
+        part, part_L = result
+        for name in CURVES:
+            stats[name].merge(part[name])
+        Ls.update(part_L)
+
+    if workers == 1:
+        absorb(aggregate(groups[0], t0, dt_p, dt_msd, chunk_frames))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futs = [ex.submit(aggregate, g, t0, dt_p, dt_msd, chunk_frames) for g in groups]
+            for fut in as_completed(futs):
+                absorb(fut.result())
+
+    if len(Ls) > 1:
+        raise ValueError(f"Las corridas tienen distintos L: {sorted(Ls)}")
+    return stats
+
+
+def plot_ensemble(t, stats, tau, tmin, tmax, a_hat):
+    import matplotlib.pyplot as plt
+
+    # Gráfico 1: presión media del ensamble con banda de error estándar
+    plt.figure(figsize=(12, 6))
+    for name, label, color in (("P_left", "Recinto izquierdo", "C0"), ("P_right", "Recinto derecho (canal)", "C1")):
+        s = stats[name]
+        m, se = s.average()[:t.size], s.stderr()[:t.size]
+        plt.fill_between(t, m - se, m + se, color=color, alpha=0.25, lw=0)
+        plt.plot(t, m, lw=2.0, color=color, label=label)
+    plt.xlabel("Tiempo (s)", fontsize=20)
+    plt.ylabel("Presión (Pa$\\cdot$m)", fontsize=20)
+    plt.legend(fontsize=20, frameon=False)
+    plt.grid(True, ls=":", alpha=0.6)
+    plt.tick_params(axis="both", labelsize=20)
+    plt.tight_layout()
+    plt.show()
+
+    # Gráfico 2: MSD del ensamble y recta ajustada
+    m, se = stats["MSD"].average(), stats["MSD"].stderr()
+    plt.figure(figsize=(7.8, 5.4))
+    plt.fill_between(tau, m - se, m + se, color="C0", alpha=0.25, lw=0)
+    plt.plot(tau, m, lw=2.0, color="C0", label="MSD del ensamble")
+    xs = np.linspace(tmin, tmax, 100)
+    plt.plot(xs, a_hat * xs, "--", lw=2.0, color="C1", label="Ajuste")
+    plt.xlabel("Tiempo (s)", fontsize=16)
+    plt.ylabel("MSD (m$^2$)", fontsize=16)
+    plt.tick_params(axis="both", labelsize=13)
+    plt.grid(True, ls=":", alpha=0.5)
+    plt.legend(fontsize=14)
+    plt.tight_layout()
+    plt.show()
+
+
+def main(folders, out_dir: Path, t0: float, dt_p: float, dt_msd: float, tmin: float, tmax: float,
+         dim: int, workers: int | None, chunk_frames: int, plot: bool = True, as_json: bool = False):
+    for folder in folders:
+        if not (Path(folder) / "static.txt").exists() or not (Path(folder) / "dynamic.txt").exists():
+            raise FileNotFoundError(f"Faltan static.txt o dynamic.txt en {folder}")
+
+    # Con más de un worker, las etapas internas de cada corrida quedan en los otros procesos
+    with stage("ensamble", items=len(folders)):
+        stats = ensemble([str(f) for f in folders], t0, dt_p, dt_msd, workers, chunk_frames)
+
+    nP = stats["P"].nbins
+    t = (np.arange(nP) + 0.5) * dt_p
+    tau = np.arange(stats["MSD"].nbins) * dt_msd
+
+    # D del MSD medio, usando sólo lags cubiertos por todas las corridas
+    m_msd = stats["MSD"].average()
+    full = stats["MSD"].count == len(folders)
+    mask = full & (tau >= tmin) & (tau <= tmax)
+    a_hat = analytic_slope_origin(tau[mask], m_msd[mask])
+    D = a_hat / (2.0 * float(dim))
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_P = out_dir / "ensemble_pressure.csv"
+    with out_P.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["t", "P", "P_se", "P_left", "P_left_se", "P_right", "P_right_se", "n_runs"])
+        # Bins sin ninguna corrida quedan en nan, no en 0
+        m = {name: stats[name].average() for name in ("P", "P_left", "P_right")}
+        se = {name: stats[name].stderr() for name in ("P", "P_left", "P_right")}
+        for k in range(nP):
+            w.writerow([f"{t[k]:.6f}",
+                        f"{m['P'][k]:.8e}", f"{se['P'][k]:.8e}",
+                        f"{m['P_left'][k]:.8e}", f"{se['P_left'][k]:.8e}",
+                        f"{m['P_right'][k]:.8e}", f"{se['P_right'][k]:.8e}",
+                        int(stats["P"].count[k])])
+
+    out_msd = out_dir / "ensemble_msd.csv"
+    with out_msd.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["tau", "MSD", "MSD_se", "n_runs"])
+        se = stats["MSD"].stderr()
+        for k in range(tau.size):
+            w.writerow([f"{tau[k]:.6f}", f"{m_msd[k]:.8e}", f"{se[k]:.8e}", int(stats["MSD"].count[k])])
+
+    if as_json:
+        print(json.dumps({
+            "runs": [str(f) for f in folders], "t0": t0, "tmin": tmin, "tmax": tmax, "dim": dim,
+            "a_hat": a_hat, "D": D, "n_points": int(mask.sum()),
+            "pressure_file": str(out_P), "msd_file": str(out_msd),
+        }))
+        return
+
+    print(f"Ensamble de {len(folders)} corridas")
+    print(f"Coeficiente de difusión del MSD medio (D): {D:.6e} m^2/s")
+    print(f"Guardado: {out_P}")
+    print(f"Guardado: {out_msd}")
+    if plot:
+        with stage("graficos"):
+            plot_ensemble(t, stats, tau, tmin, tmax, a_hat)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folders", nargs="+", type=Path, help="Carpetas de corridas con el mismo L (distinta semilla)")
+    ap.add_argument("--out", type=Path, default=Path("."),
+                    help="Carpeta donde guardar ensemble_pressure.csv y ensemble_msd.csv (default .)")
+    ap.add_argument("--t0", type=float, default=51.0, help="Referencia del MSD (default 51 s)")
+    ap.add_argument("--dt-p", type=float, default=1.0, help="Grilla temporal de la presión (default 1 s)")
+    ap.add_argument("--dt-msd", type=float, default=0.1, help="Grilla de lags del MSD (default 0.1 s)")
+    ap.add_argument("--tmin", type=float, default=1.0, help="Inicio del ajuste del MSD medio (default 1 s)")
+    ap.add_argument("--tmax", type=float, default=20.0, help="Fin del ajuste del MSD medio (default 20 s)")
+    ap.add_argument("--dim", type=int, default=2)
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Procesos en paralelo, cada uno con un grupo de corridas (default: cantidad de CPUs)")
+    ap.add_argument("--chunk-frames", type=int, default=DEFAULT_CHUNK_FRAMES,
+                    help="Frames leídos por bloque (acota la memoria usada)")
+    ap.add_argument("--no-plot", action="store_true", help="No abre gráficos (modo batch)")
+    ap.add_argument("--json", action="store_true",
+                    help="Imprime D del MSD medio y las rutas de salida como JSON (implica --no-plot)")
+    add_profile_arguments(ap)
+    args = ap.parse_args()
+    setup_profiling(args)
+    main(args.folders, args.out, args.t0, args.dt_p, args.dt_msd, args.tmin, args.tmax, args.dim,
+         args.workers, args.chunk_frames, plot=not args.no_plot, as_json=args.json)
@@ -0,0 +1,140 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Caminos calientes de la lectura y del análisis, vectorizados con NumPy. check()
+# los compara contra los loops escalares originales en una corrida.
+
+
+def header_events(heads: list, N: int, start: int = 0):
+    """
+    Tiempos e IDs de borde de una lista de encabezados "t id1 id2 ...".
+    Devuelve (times, ev_frame, ev_idx) con ev_frame relativo a la lista.
+    """
+    times = np.empty(len(heads), dtype=float)
+    ev_frame = []
+    ev_idx = []
+    for k, head in enumerate(heads):
+        toks = head.split()
+        try:
+            times[k] = float(toks[0])
+        except (ValueError, IndexError):
+            raise ValueError(f"Frame {start + k}: esperaba tiempo al inicio, leí: {head!r}")
+        for tok in toks[1:]:
+            try:
+                pid = int(tok)
+            except ValueError:
+                continue
+            if 1 <= pid <= N:
+                ev_frame.append(k)
+                ev_idx.append(pid - 1)
+    return times, np.array(ev_frame, dtype=int), np.array(ev_idx, dtype=int)
+
+
+def wall_hits(X, Y, VX, VY, L: float, R: float, enc: float, eps: float):
+    """
+    Choques con paredes de todos los eventos a la vez (versión vectorizada de
+    classify_wall_and_recinto). Devuelve, por choque y en el mismo orden que el loop
+    escalar: (índice de evento, True si es del recinto derecho, |v| normal a la pared).
+    """
+    X = np.asarray(X, float)
+    Y = np.asarray(Y, float)
+    VX = np.asarray(VX, float)
+    VY = np.asarray(VY, float)
+    y0 = (enc - L) / 2.0
+    y1 = y0 + L
+    left = X < enc
+    conds = (
+        ((np.abs(X - R) <= eps) & (VX > 0), False, VX),
+        ((np.abs(X - (enc - R)) <= eps) & ((Y <= (y0 - R + eps)) | (Y >= (y1 + R - eps))) & (VX < 0), False, VX),
+        ((np.abs(X - (2 * enc - R)) <= eps) & (VX < 0), True, VX),
+        (left & (np.abs(Y - R) <= eps) & (VY > 0), False, VY),
+        (left & (np.abs(Y - (enc - R)) <= eps) & (VY < 0), False, VY),
+        (~left & (np.abs(Y - (y0 + R)) <= eps) & (VY > 0), True, VY),
+        (~left & (np.abs(Y - (y1 - R)) <= eps) & (VY < 0), True, VY),
+    )
+    ev = np.concatenate([np.flatnonzero(m) for m, _, _ in conds])
+    right = np.concatenate([np.full(np.count_nonzero(m), r) for m, r, _ in conds])
+    speed = np.concatenate([np.abs(v[m]) for m, _, v in conds])
+    # Orden por evento y, dentro de cada evento, por condición: igual que el loop escalar
+    order = np.argsort(ev, kind="stable")
+    return ev[order], right[order], speed[order]
+
+
+def ballistic(pos: np.ndarray, vel: np.ndarray, dt: float, out: np.ndarray | None = None) -> np.ndarray:
+    """pos + vel * dt escrito en `out` (se reusa entre cuadros de la animación)."""
+    if out is None:
+        out = np.empty(pos.shape)
+    np.multiply(vel, dt, out=out)
+    out += pos
+    return out
+
+
+def _reference_pressures(times_ev, X, Y, VX, VY, L, R, M):
+    """Loop escalar original de compute_pressures_from_events, como referencia."""
+    from pressure_core import ENC, classify_wall_and_recinto
+
+    len_left = 4 * ENC - L
+    len_right = 2 * ENC + L
+    t0 = float(times_ev.min())
+    nbins = max(1, int(np.ceil((float(times_ev.max()) - t0) / 1)))
+    accL = np.zeros(nbins)
+    accR = np.zeros(nbins)
+    for x, y, vx, vy, te in zip(X, Y, VX, VY, times_ev):
+        b = int((te - t0) // 1)
+        if b < 0 or b >= nbins:
+            continue
+        for orient, rec in classify_wall_and_recinto(x, y, vx, vy, L, R):
+            delta_p = 2.0 * M * (abs(vx) if orient == 'V' else abs(vy))
+            if rec == 'L':
+                accL[b] += delta_p
+            else:
+                accR[b] += delta_p
+    return accL / len_left, accR / len_right
+
+
+def _reference_msd(pos, ref_index: int) -> np.ndarray:
+    """MSD frame por frame, sin bloques, como referencia de compute_msd."""
+    r0 = np.asarray(pos[ref_index], dtype=float)
+    msd = np.empty(len(pos))
+    for f in range(len(pos)):
+        disp = np.asarray(pos[f], dtype=float) - r0
+        msd[f] = np.mean(np.sum(disp * disp, axis=1))
+    return msd
+
+
+def check(folder: Path) -> bool:
+    """
+    Compara en una corrida los caminos vectorizados contra las referencias
+    escalares: presiones, MSD e interpolación balística tienen que ser idénticas
+    bit a bit.
+    """
+    from simulation_io import read_static, load_run, collision_events
+    from pressure_core import compute_pressures_from_events
+    from diffusion_core import compute_msd
+
+    N, L, R, M, V, T = read_static(folder / "static.txt")
+    run = load_run(folder / "dynamic.txt", N)
+    t_ev, _, X, Y, VX, VY = collision_events(run.times, run.pos, run.ev_frame, run.ev_idx, run.ev_vel)
+    k = len(run.times) // 2
+    dt = 0.0123
+
+    same = {}
+    if t_ev.size:
+        _, P_L, P_R = compute_pressures_from_events(t_ev, X, Y, VX, VY, N, L, R, M)
+        ref_L, ref_R = _reference_pressures(t_ev, X, Y, VX, VY, L, R, M)
+        same["presiones"] = np.array_equal(P_L, ref_L) and np.array_equal(P_R, ref_R)
+    same["MSD"] = np.array_equal(compute_msd(run.pos, ref_index=k, chunk_frames=7), _reference_msd(run.pos, k))
+    same["balística"] = np.array_equal(ballistic(run.pos[k], run.vel[k], dt), run.pos[k] + run.vel[k] * dt)
+    print(f"{folder}: " + ", ".join(f"{key} {'OK' if v else 'DISTINTO'}" for key, v in same.items()))
+    return all(same.values())
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--check", nargs="+", type=Path, required=True, metavar="FOLDER",
+                    help="Carpetas con static.txt y dynamic.txt donde comparar los caminos")
+    args = ap.parse_args()
+    ok = all([check(folder) for folder in args.check])
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,341 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from simulation_io import (
+    COMPACT_MODES,
+    DEFAULT_CHUNK_FRAMES,
+    FixedPointPositions,
+    encode_positions,
+    encode_velocities,
+    iter_dynamic_chunks,
+    iter_frame_chunks,
+    read_static,
+)
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
+
+SCAN_BLOCK = 1 << 26  # 64 MiB
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Se adjunta a un segmento creado por un proceso no relacionado.
+
+    El resource_tracker de este proceso lo borraría al salir; el dueño es quien lo
+    crea, así que se lo desregistra. Los workers de load_dynamic_parallel comparten
+    el tracker del padre y no pasan por acá.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _layout(F: int, N: int, E: int, compact: str | None, with_vel: bool) -> dict:
+    """Forma y dtype de cada segmento según el modo de almacenamiento."""
+    pos_dtype = {None: np.float64, "float32": np.float32, "fixed": np.int32}[compact]
+    vel_dtype = np.float64 if compact is None else np.float32
+    layout = {"times": ((F,), np.float64), "pos": ((F, N, 2), pos_dtype)}
+    if with_vel:
+        layout["vel"] = ((F, N, 2), vel_dtype)
+    layout["events"] = ((E, 2), np.int64)
+    layout["ev_vel"] = ((E, 2), np.float64)
+    return layout
+
+
+class SharedRun:
+    """Corrida parseada en segmentos de shared memory.
+
+    times (F,), pos (F, N, 2), vel (F, N, 2), events (E, 2) = [frame, índice de partícula]
+    y ev_vel (E, 2) son vistas sin copia sobre los segmentos. Con `compact` las
+    posiciones quedan en float32 o en punto fijo (pos es FixedPointPositions) y las
+    velocidades en float32; con with_vel=False no hay segmento de velocidades.
+    `meta()` describe los segmentos para que otro proceso pueda adjuntarse con
+    `SharedRun.attach(meta)`.
+    """
+
+    def __init__(self, F: int, N: int, shms: dict, E: int, owner: bool,
+                 compact: str | None = None, with_vel: bool = True):
+        self.F = F
+        self.N = N
+        self.E = E
+        self.compact = compact
+        self.with_vel = with_vel
+        self._shms = shms
+        self._owner = owner
+        self._map_views()
+
+    def _map_views(self):
+        layout = _layout(self.F, self.N, self.E, self.compact, self.with_vel)
+        views = {k: np.ndarray(shape, dtype=dtype, buffer=self._shms[k].buf)
+                 for k, (shape, dtype) in layout.items() if k in self._shms}
+        self.times = views["times"]
+        self.pos = FixedPointPositions(views["pos"]) if self.compact == "fixed" else views["pos"]
+        self.vel = views.get("vel")
+        self.events = views.get("events", np.zeros((0, 2), dtype=np.int64))
+        self.ev_vel = views.get("ev_vel", np.zeros((0, 2), dtype=np.float64))
+
+    @classmethod
+    def allocate(cls, F: int, N: int, compact: str | None = None, with_vel: bool = True) -> "SharedRun":
+        layout = _layout(F, N, 0, compact, with_vel)
+        shms = {k: shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dt).itemsize))
+                for k, (shape, dt) in layout.items() if k not in ("events", "ev_vel")}
+        return cls(F, N, shms, 0, owner=True, compact=compact, with_vel=with_vel)
+
+    @classmethod
+    def attach(cls, meta: dict) -> "SharedRun":
+        shms = {k: _attach(name) for k, name in meta["segments"].items()}
+        return cls(meta["F"], meta["N"], shms, meta["E"], owner=False,
+                   compact=meta.get("compact"), with_vel=meta.get("with_vel", True))
+
+    def set_events(self, ev_frame: np.ndarray, ev_idx: np.ndarray, ev_vel: np.ndarray):
+        """Guarda los eventos de borde en sus propios segmentos (su cantidad se conoce al final)."""
+        E = int(ev_frame.size)
+        self._shms["events"] = shared_memory.SharedMemory(create=True, size=max(1, E * 16))
+        self._shms["ev_vel"] = shared_memory.SharedMemory(create=True, size=max(1, E * 16))
+        self.E = E
+        self._map_views()
+        self.events[:, 0] = ev_frame
+        self.events[:, 1] = ev_idx
+        self.ev_vel[:] = ev_vel
+
+    def meta(self) -> dict:
+        return {"F": self.F, "N": self.N, "E": self.E, "compact": self.compact, "with_vel": self.with_vel,
+                "segments": {k: shm.name for k, shm in self._shms.items()}}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shm.size for shm in self._shms.values())
+
+    @property
+    def ev_frame(self) -> np.ndarray:
+        return self.events[:, 0]
+
+    @property
+    def ev_idx(self) -> np.ndarray:
+        return self.events[:, 1]
+
+    def close(self):
+        # Hay que soltar las vistas antes de cerrar los buffers
+        self.times = self.pos = self.vel = self.events = self.ev_vel = None
+        for shm in self._shms.values():
+            shm.close()
+
+    def unlink(self):
+        for shm in self._shms.values():
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self._owner:
+            self.unlink()
+
+
+def frame_offsets(dynamic_path: Path, N: int, nseg: int):
+    """
+    Cantidad total de frames y offsets en bytes donde empiezan `nseg` segmentos
+    alineados a frames. Como cada encabezado va seguido de exactamente N líneas,
+    el frame k empieza en la línea k * (N + 1); sólo hace falta contar '\\n'.
+    Devuelve (F, [(frame_inicio, offset), ...]).
+    """
+    lpf = N + 1
+    counts = []
+    size = 0
+    last = b"\n"
+    with dynamic_path.open("rb") as f:
+        while True:
+            block = f.read(SCAN_BLOCK)
+            if not block:
+                break
+            counts.append(block.count(b"\n"))
+            size += len(block)
+            last = block[-1:]
+    total_lines = sum(counts) + (0 if last == b"\n" else 1)
+    F = total_lines // lpf
+    if F == 0:
+        return 0, []
+
+    nseg = max(1, min(nseg, F))
+    starts = sorted({(j * F) // nseg for j in range(nseg)})
+    targets = [k * lpf for k in starts]  # línea con la que empieza cada segmento
+
+    offsets = []
+    cum = np.concatenate([[0], np.cumsum(counts)])
+    with dynamic_path.open("rb") as f:
+        for line_no in targets:
+            if line_no == 0:
+                offsets.append(0)
+                continue
+            # La línea `line_no` empieza justo después del '\n' número line_no (1-based)
+            b = int(np.searchsorted(cum, line_no, side="left")) - 1
+            f.seek(b * SCAN_BLOCK)
+            block = np.frombuffer(f.read(SCAN_BLOCK), dtype=np.uint8)
+            nl = np.flatnonzero(block == 10)
+            offsets.append(b * SCAN_BLOCK + int(nl[line_no - cum[b] - 1]) + 1)
+    return F, list(zip(starts, offsets))
+
+
+def _parse_segment(path: str, N: int, start: int, offset: int, end: int | None, nframes: int,
+                   meta: dict, chunk_frames: int):
+    """
+    Worker: parsea los `nframes` frames del rango de bytes [offset, end) (hasta el
+    final del archivo si end es None) y escribe directo en shared memory.
+    """
+    compact = meta["compact"]
+    shms = {k: shared_memory.SharedMemory(name=name) for k, name in meta["segments"].items()}
+    run = SharedRun(meta["F"], N, shms, 0, owner=False, compact=compact, with_vel=meta["with_vel"])
+    pos = run.pos.raw if compact == "fixed" else run.pos
+    try:
+        ev_frame = []
+        ev_idx = []
+        ev_vel = []
+        done = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            nbytes = None if end is None else end - offset
+            # Mismo lector en bytes crudos que iter_dynamic_chunks, acotado al segmento
+            for chunk in iter_frame_chunks(f, N, chunk_frames, start, nbytes):
+                n = len(chunk.times)
+                if done + n > nframes:
+                    raise ValueError(f"El segmento que empieza en el frame {start} tiene más de {nframes} frames")
+                sl = slice(start + done, start + done + n)
+                run.times[sl] = chunk.times
+                p = encode_positions(chunk.pos, compact)
+                pos[sl] = p.raw if compact == "fixed" else p
+                if run.vel is not None:
+                    run.vel[sl] = chunk.vel
+                ev_frame.append(chunk.ev_frame + start + done)
+                ev_idx.append(chunk.ev_idx)
+                ev_vel.append(chunk.vel[chunk.ev_frame, chunk.ev_idx])
+                done += n
+        if done != nframes:
+            raise ValueError(f"EOF inesperado en el frame {start + done}")
+    finally:
+        del pos
+        run.close()
+    if not ev_frame:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, 2))
+    return np.concatenate(ev_frame), np.concatenate(ev_idx), np.concatenate(ev_vel)
+
+
+def _load_single(dynamic_path: Path, N: int, chunk_frames: int, compact: str | None,
+                 with_vel: bool) -> SharedRun:
+    """
+    Un solo proceso: no vale la pena contar líneas antes para preasignar. Se parsea
+    en serie como load_run y cada array se concatena directo en su segmento.
+    """
+    times, pos, vel, ev_frame, ev_idx, ev_vel = [], [], [], [], [], []
+    for chunk in iter_dynamic_chunks(dynamic_path, N, chunk_frames):
+        times.append(chunk.times)
+        p = encode_positions(chunk.pos, compact)
+        pos.append(p.raw if compact == "fixed" else p)
+        if with_vel:
+            vel.append(encode_velocities(chunk.vel, compact))
+        ev_frame.append(chunk.ev_frame + chunk.start)
+        ev_idx.append(chunk.ev_idx)
+        ev_vel.append(chunk.vel[chunk.ev_frame, chunk.ev_idx])
+    if not times:
+        raise ValueError("dynamic.txt no tiene frames.")
+
+    run = SharedRun.allocate(sum(len(t) for t in times), N, compact, with_vel)
+    try:
+        np.concatenate(times, out=run.times)
+        np.concatenate(pos, out=run.pos.raw if compact == "fixed" else run.pos)
+        if with_vel:
+            np.concatenate(vel, out=run.vel)
+        run.set_events(np.concatenate(ev_frame), np.concatenate(ev_idx), np.concatenate(ev_vel))
+    except BaseException:
+        run.close()
+        run.unlink()
+        raise
+    return run
+
+
+def load_dynamic_parallel(dynamic_path: Path, N: int, workers: int | None = None,
+                          chunk_frames: int = DEFAULT_CHUNK_FRAMES,
+                          compact: str | None = None, with_vel: bool = True) -> SharedRun:
+    """
+    Carga dynamic.txt repartiendo segmentos alineados a frames entre procesos.
+    Cada worker escribe sus frames en los arrays compartidos preasignados, así que
+    el proceso padre recibe vistas sin copia. El llamador es dueño de los segmentos:
+    usar `with load_dynamic_parallel(...) as run:` o llamar close() + unlink().
+    `compact` y `with_vel` eligen la representación (ver SharedRun).
+    """
+    if compact is not None and compact not in COMPACT_MODES:
+        raise ValueError(f"Modo compacto desconocido: {compact!r}")
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        with stage("carga paralela") as st:
+            run = _load_single(dynamic_path, N, chunk_frames, compact, with_vel)
+            st.add(run.F)
+        return run
+    F, segs = frame_offsets(dynamic_path, N, workers)
+    if F == 0:
+        raise ValueError("dynamic.txt no tiene frames.")
+
+    run = SharedRun.allocate(F, N, compact, with_vel)
+    meta = run.meta()
+    bounds = [s for s, _ in segs] + [F]
+    ends = [off for _, off in segs[1:]] + [None]
+    try:
+        jobs = [(str(dynamic_path), N, start, offset, ends[j], bounds[j + 1] - start, meta, chunk_frames)
+                for j, (start, offset) in enumerate(segs)]
+        # Los workers no reportan sus etapas: acá se mide la carga completa
+        with stage("carga paralela", items=F):
+            if len(jobs) == 1:
+                results = [_parse_segment(*jobs[0])]
+            else:
+                with ProcessPoolExecutor(max_workers=len(jobs)) as ex:
+                    results = list(ex.map(_parse_segment, *zip(*jobs)))
+        ev_frame = np.concatenate([r[0] for r in results])
+        ev_idx = np.concatenate([r[1] for r in results])
+        ev_vel = np.concatenate([r[2] for r in results])
+    except BaseException:
+        run.close()
+        run.unlink()
+        raise
+
+    run.set_events(ev_frame, ev_idx, ev_vel)
+    return run
+
+
+def main(folder: Path, workers: int | None, chunk_frames: int, compact: str | None, with_vel: bool):
+    static_path = folder / "static.txt"
+    dynamic_path = folder / "dynamic.txt"
+    if not static_path.exists() or not dynamic_path.exists():
+        raise FileNotFoundError(f"Faltan static.txt o dynamic.txt en {folder}")
+
+    N, L, R, M, V, T = read_static(static_path)
+    t0 = time.perf_counter()
+    with load_dynamic_parallel(dynamic_path, N, workers, chunk_frames, compact, with_vel) as run:
+        dt = time.perf_counter() - t0
+        print(f"{run.F} frames, N = {run.N}, {run.E} eventos de borde")
+        print(f"Cargado en {dt:.3f} s ({run.nbytes / 2**20:.1f} MiB en shared memory)")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder", type=Path, help="Carpeta con static.txt y dynamic.txt")
+    ap.add_argument("--workers", type=int, default=None, help="Procesos (default: cantidad de CPUs)")
+    ap.add_argument("--chunk-frames", type=int, default=DEFAULT_CHUNK_FRAMES,
+                    help="Frames parseados por bloque dentro de cada worker")
+    ap.add_argument("--compact", choices=COMPACT_MODES, default=None,
+                    help="Posiciones en float32 o en punto fijo int32 (velocidades en float32)")
+    ap.add_argument("--no-vel", action="store_true",
+                    help="No guarda velocidades (sólo las de los eventos de borde)")
+    add_profile_arguments(ap)
+    args = ap.parse_args()
+    setup_profiling(args)
+    main(args.folder, args.workers, args.chunk_frames, args.compact, not args.no_vel)
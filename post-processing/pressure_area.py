@@ -1,50 +1,33 @@
 import argparse
+import json
 from pathlib import Path
-import numpy as np
-import matplotlib.pyplot as plt
 
-from pressure_analysis import (
-    read_static,
-    read_collision_events,
+from pressure_core import (
+    load_collision_events,
     compute_pressures_from_events,
-    ENC,
+    area_total,
+    steady_stats,
+    detect_equilibration,
 )
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
+from simulation_io import read_static
 
-def area_total(L: float, r) -> float:
-    #return ENC*ENC + ENC*L
-    return (ENC - 2*r)**2 + (ENC - 2*r)*L
 
-def steady_stats(t, P_left, P_right, tmin: float = 60.0):
-    if len(t) == 0:
-        return np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, 0
+def plot_pressure_vs_area(Ainv_vals, Pavg_vals, Pstd_vals):
+    import matplotlib.pyplot as plt
 
-    mask = (t >= tmin)
-    if not np.any(mask):
-        mask = slice(None)
-
-    Pc = 0.5 * (P_left[mask] + P_right[mask])
-    Pl = P_left[mask]
-    Pr = P_right[mask]
-
-    n = int(np.size(Pc))
-    if n >= 2:
-        P_mean      = float(np.mean(Pc))
-        P_std       = float(np.std(Pc, ddof=1))
-        P_mean_left = float(np.mean(Pl))
-        P_std_left  = float(np.std(Pl, ddof=1))
-        P_mean_right= float(np.mean(Pr))
-        P_std_right = float(np.std(Pr, ddof=1))
-    elif n == 1:
-        P_mean      = float(Pc[0]); P_std = 0.0
-        P_mean_left = float(Pl[0]); P_std_left = 0.0
-        P_mean_right= float(Pr[0]); P_std_right = 0.0
-    else:
-        P_mean=P_std=P_mean_left=P_std_left=P_mean_right=P_std_right=np.nan
-
-    return P_mean, P_std, P_mean_left, P_std_left, P_mean_right, P_std_right, n
+    plt.figure(figsize=(7.5, 5))
+    plt.errorbar(Ainv_vals, Pavg_vals, yerr=Pstd_vals, fmt='o', lw=1.2, capsize=4)
+    plt.xlabel(r"$Area^{-1}$  (m$^{-2}$)", fontsize=20)
+    plt.ylabel(r"Presión Promedio  (Pa$\cdot$m)", fontsize=20)
+    #plt.title(r"Presión promedio en régimen vs $A^{-1}$")
+    plt.tick_params(axis="both", labelsize=20)
+    plt.grid(True, ls=":", alpha=0.5)
+    plt.tight_layout()
+    plt.show()
 
 
-def main(folders):
+def main(folders, tmin: float | None = None, plot: bool = True, as_json: bool = False):
     results = []
     for folder in folders:
         folder = Path(folder)
@@ -54,13 +37,14 @@ def main(folders):
             raise FileNotFoundError(f"Faltan archivos en {folder}")
 
         N, L, R, M, V, T = read_static(static_path)
-        times_ev, idx_ev, X, Y, VX, VY = read_collision_events(dynamic_path, N)
+        times_ev, idx_ev, X, Y, VX, VY = load_collision_events(folder, N)
         t, P_L, P_R = compute_pressures_from_events(times_ev, X, Y, VX, VY, N, L, R, M)
 
-        Pavg, Pstd, PavgL, PstdL, PavgR, PstdR, n = steady_stats(t, P_L, P_R, tmin=60.0)
+        t_eq = tmin if tmin is not None else detect_equilibration(t, P_L, P_R)
+        Pavg, Pstd, PavgL, PstdL, PavgR, PstdR, n = steady_stats(t, P_L, P_R, tmin=t_eq)
         A = area_total(L, R)
         Ainv = 1.0 / A
-        results.append((L, A, Ainv, Pavg, Pstd, PavgL, PstdL, PavgR, PstdR, Pavg*A, n))
+        results.append((L, A, Ainv, Pavg, Pstd, PavgL, PstdL, PavgR, PstdR, Pavg*A, n, t_eq))
 
     results.sort(key=lambda x: x[0])
 
@@ -68,18 +52,24 @@ def main(folders):
     Pavg_vals = [r[3] for r in results]
     Pstd_vals = [r[4] for r in results]
 
-    plt.figure(figsize=(7.5, 5))
-    plt.errorbar(Ainv_vals, Pavg_vals, yerr=Pstd_vals, fmt='o', lw=1.2, capsize=4)
-    plt.xlabel(r"$Area^{-1}$  (m$^{-2}$)", fontsize=20)
-    plt.ylabel(r"Presión Promedio  (Pa$\cdot$m)", fontsize=20)
-    #plt.title(r"Presión promedio en régimen vs $A^{-1}$")
-    plt.tick_params(axis="both", labelsize=20)
-    plt.grid(True, ls=":", alpha=0.5)
-    plt.tight_layout()
-    plt.show()
+    if as_json:
+        keys = ("L", "A", "A_inv", "P_mean", "P_std", "P_left_mean", "P_left_std",
+                "P_right_mean", "P_right_std", "PA", "n_bins", "t_eq")
+        print(json.dumps({"tmin": tmin, "runs": [dict(zip(keys, r)) for r in results]}))
+    elif plot:
+        with stage("graficos"):
+            plot_pressure_vs_area(Ainv_vals, Pavg_vals, Pstd_vals)
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("folders", nargs=4, help="Cuatro carpetas de simulación (una por L)")
+    ap.add_argument("--tmin", type=float, default=None,
+                    help="Descarta datos con t < tmin para promediar "
+                         "(default: equilibración detectada con MSER en cada corrida)")
+    ap.add_argument("--no-plot", action="store_true", help="No abre gráficos (modo batch)")
+    ap.add_argument("--json", action="store_true",
+                    help="Imprime los resultados por carpeta como JSON (implica --no-plot)")
+    add_profile_arguments(ap)
     args = ap.parse_args()
-    main(args.folders)
+    setup_profiling(args)
+    main(args.folders, args.tmin, plot=not args.no_plot, as_json=args.json)
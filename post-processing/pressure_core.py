@@ -0,0 +1,247 @@
+import csv
+from pathlib import Path
+
+import numpy as np
+
+from kernels import wall_hits
+from profiling import stage
+from simulation_io import collision_events, iter_dynamic_chunks, served_run
+
+ENC = 0.09
+EPS = 2e-5
+
+def map_particle_id(pid: int, N: int) -> int | None:
+    if 1 <= pid <= N:
+        return pid - 1
+    return None
+
+
+def read_collision_events(dynamic_path: Path, N: int):
+    """
+    Eventos de borde (tiempo, índice, x, y, vx, vy) de dynamic.txt. Se recorre por
+    bloques con parse_frame_block, cuyo escaneo de encabezados usa kernels.header_events.
+    """
+    times_ev = []
+    idx_ev = []
+    X = []; Y = []; VX = []; VY = []
+
+    for chunk in iter_dynamic_chunks(dynamic_path, N):
+        times_ev.append(chunk.times[chunk.ev_frame])
+        idx_ev.append(chunk.ev_idx)
+        X.append(chunk.pos[chunk.ev_frame, chunk.ev_idx, 0])
+        Y.append(chunk.pos[chunk.ev_frame, chunk.ev_idx, 1])
+        VX.append(chunk.vel[chunk.ev_frame, chunk.ev_idx, 0])
+        VY.append(chunk.vel[chunk.ev_frame, chunk.ev_idx, 1])
+
+    if not times_ev:
+        empty = np.zeros(0)
+        return empty, np.zeros(0, dtype=int), empty, empty, empty, empty
+    return (np.concatenate(times_ev),
+            np.concatenate(idx_ev).astype(int),
+            np.concatenate(X),
+            np.concatenate(Y),
+            np.concatenate(VX),
+            np.concatenate(VY))
+
+def load_collision_events(folder: Path, N: int):
+    """Como read_collision_events, pero usa el servidor de corridas si está levantado."""
+    run = served_run(folder)
+    if run is None:
+        return read_collision_events(folder / "dynamic.txt", N)
+    with run, stage("servidor", items=len(run.ev_frame)):
+        return collision_events(run.times, run.pos, run.ev_frame, run.ev_idx, run.ev_vel)
+
+def compute_pressures_from_events(times_ev, X, Y, VX, VY, N, L, R, M, out_csv: Path | None = None):
+    """
+    Binning temporal con ΔT fijo (estimado automáticamente):
+      - Define bins uniformes en [t_min, t_max] con ancho dt_bin.
+      - Suma impulsos de choques dentro de cada bin.
+      - P_left/right = impulso_acum / (dt_bin * longitud_de_pared).
+    """
+    len_left  = 4*ENC - L
+    len_right = 2*ENC + L
+
+    if len(times_ev) == 0:
+        raise ValueError("No hay eventos de pared.")
+
+    dt_bin = 1
+
+    t0 = float(times_ev.min())
+    t1 = float(times_ev.max())
+    nbins = max(1, int(np.ceil((t1 - t0) / dt_bin)))
+    edges = t0 + np.arange(nbins + 1) * dt_bin
+
+    accL = np.zeros(nbins)
+    accR = np.zeros(nbins)
+
+    # Todos los choques de una vez (kernels.wall_hits) y acumulación con bincount
+    # en el mismo orden que el loop evento por evento
+    with stage("clasificacion", items=len(times_ev)):
+        ev, right, speed = wall_hits(X, Y, VX, VY, L, R, ENC, EPS)
+    with stage("binning", items=len(ev)):
+        b = np.floor_divide(np.asarray(times_ev, float)[ev] - t0, dt_bin).astype(np.int64)
+        keep = (b >= 0) & (b < nbins)
+        delta_p = 2.0 * M * speed
+        inL = keep & ~right
+        inR = keep & right
+        accL += np.bincount(b[inL], weights=delta_p[inL], minlength=nbins)
+        accR += np.bincount(b[inR], weights=delta_p[inR], minlength=nbins)
+
+    P_left  = accL / (dt_bin * len_left)
+    P_right = accR / (dt_bin * len_right)
+    t_mid   = 0.5 * (edges[:-1] + edges[1:])
+
+    if out_csv is not None:
+        with out_csv.open("w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["t", "P_left", "P_right"])
+            for tc, pl, pr in zip(t_mid, P_left, P_right):
+                w.writerow([f"{tc:.6f}", f"{pl:.8e}", f"{pr:.8e}"])
+
+    return t_mid, P_left, P_right
+
+
+def classify_wall_and_recinto(x, y, vx, vy, L, R):
+    y0 = (ENC - L) / 2.0
+    y1 = y0 + L
+    hits = []
+
+    if abs(x - R) <= EPS and vx > 0:
+        hits.append(('V', 'L'))
+    if abs(x - (ENC - R)) <= EPS:
+        if y <= (y0 - R + EPS) or y >= (y1 + R - EPS):
+            if vx < 0:
+                hits.append(('V', 'L'))
+    if abs(x - (2*ENC - R)) <= EPS and vx < 0:
+        hits.append(('V', 'R'))
+
+    if x < ENC:
+        if abs(y - R) <= EPS and vy > 0:
+            hits.append(('H', 'L'))
+        if abs(y - (ENC - R)) <= EPS and vy < 0:
+            hits.append(('H', 'L'))
+    else:
+        if abs(y - (y0 + R)) <= EPS and vy > 0:
+            hits.append(('H', 'R'))
+        if abs(y - (y1 - R)) <= EPS and vy < 0:
+            hits.append(('H', 'R'))
+
+    return hits
+
+
+def area_total(L: float, r) -> float:
+    #return ENC*ENC + ENC*L
+    return (ENC - 2*r)**2 + (ENC - 2*r)*L
+
+
+def detect_equilibration(t, *series, max_frac: float = 0.5) -> float:
+    """
+    Tiempo de equilibración por la regla MSER (marginal standard error rule):
+    para cada corte d se mide el error estándar al cuadrado del promedio de y[d:],
+      MSER(d) = sum_{i>=d} (y_i - media_d)^2 / (n - d)^2,
+    y se toma el d que lo minimiza (sólo d <= max_frac * n). Las sumas de cola de
+    y e y^2 salen de un cumsum, así que es O(n). Con varias series se devuelve el
+    corte más tardío.
+    """
+    t = np.asarray(t, float)
+    n = t.size
+    if n == 0 or not series:
+        return float("nan")
+    dmax = max(0, min(n - 2, int(max_frac * n)))
+    m = n - np.arange(dmax + 1)
+    t_eq = float(t[0])
+    for y in series:
+        y = np.asarray(y, float)
+        S1 = np.cumsum(y[::-1])[::-1][:dmax + 1]
+        S2 = np.cumsum((y * y)[::-1])[::-1][:dmax + 1]
+        mser = np.maximum(S2 - S1 * S1 / m, 0.0) / (m * m)
+        t_eq = max(t_eq, float(t[int(np.argmin(mser))]))
+    return t_eq
+
+
+def sliding_mean_std(t, y, width: float):
+    """
+    Promedio y std (ddof=1) de y sobre cada ventana [t_i, t_i + width], con una
+    ventana por muestra. Usa sumas acumuladas de y e y^2: O(n) más un searchsorted.
+    Devuelve (t_start, mean, std, n_por_ventana).
+    """
+    t = np.asarray(t, float)
+    y = np.asarray(y, float)
+    C1 = np.concatenate([[0.0], np.cumsum(y)])
+    C2 = np.concatenate([[0.0], np.cumsum(y * y)])
+    i = np.arange(t.size)
+    j = np.searchsorted(t, t + width, side="right")
+    n = j - i
+    mean = (C1[j] - C1[i]) / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (C2[j] - C2[i] - n * mean * mean) / (n - 1)
+    std = np.where(n > 1, np.sqrt(np.maximum(var, 0.0)), 0.0)
+    return t, mean, std, n
+
+
+def steady_stats(t, P_left, P_right, tmin: float | None = None):
+    """Promedio y std en régimen (descarta t < tmin; si tmin es None lo detecta con MSER)."""
+    if len(t) == 0:
+        return np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, 0
+    if tmin is None:
+        tmin = detect_equilibration(t, P_left, P_right)
+
+    mask = (t >= tmin)
+    if not np.any(mask):
+        mask = slice(None)
+
+    Pc = 0.5 * (P_left[mask] + P_right[mask])
+    Pl = P_left[mask]
+    Pr = P_right[mask]
+
+    n = int(np.size(Pc))
+    if n >= 2:
+        P_mean      = float(np.mean(Pc))
+        P_std       = float(np.std(Pc, ddof=1))
+        P_mean_left = float(np.mean(Pl))
+        P_std_left  = float(np.std(Pl, ddof=1))
+        P_mean_right= float(np.mean(Pr))
+        P_std_right = float(np.std(Pr, ddof=1))
+    elif n == 1:
+        P_mean      = float(Pc[0]); P_std = 0.0
+        P_mean_left = float(Pl[0]); P_std_left = 0.0
+        P_mean_right= float(Pr[0]); P_std_right = 0.0
+    else:
+        P_mean=P_std=P_mean_left=P_std_left=P_mean_right=P_std_right=np.nan
+
+    return P_mean, P_std, P_mean_left, P_std_left, P_mean_right, P_std_right, n
+
+
+def analytic_c_hat(x, y):
+    """Mínimos cuadrados por el origen (no ponderado): c* = sum(xy)/sum(x^2)."""
+    x = np.asarray(x, float)
+    y = np.asarray(y, float)
+    Sxx = np.sum(x * x)
+    Sxy = np.sum(x * y)
+    c_hat = Sxy / Sxx
+    sigma_c = np.sqrt(1.0 / Sxx) 
+    return c_hat, sigma_c
+
+
+def build_error_curve(x, y, cmin=None, cmax=None, num=400):
+    """Devuelve grid de c y E(c) = sum (y - c x)^2."""
+    x = np.asarray(x, float); y = np.asarray(y, float)
+    c_auto = np.sum(x * y) / np.sum(x * x)
+    if cmin is None or cmax is None:
+        span = 3.0 * abs(c_auto) if abs(c_auto) > 0 else 1.0
+        cmin = c_auto - span
+        cmax = c_auto + span
+        if cmin == cmax:
+            cmin, cmax = c_auto - 1.0, c_auto + 1.0
+    cs = np.linspace(cmin, cmax, num)
+    E = np.array([np.sum((y - c * x) ** 2) for c in cs])
+    idx = int(np.argmin(E))
+    return cs, E, cs[idx], E[idx]
+
+
+def r2_score(y, y_pred):
+    y = np.asarray(y, float)
+    y_pred = np.asarray(y_pred, float)
+    ss_res = np.sum((y - y_pred)**2)
+    ss_tot = np.sum((y - np.mean(y))**2)
+    return 1.0 - ss_res/ss_tot if ss_tot > 0 else np.nan
@@ -1,117 +1,24 @@
 import argparse
+import json
 from pathlib import Path
 import numpy as np
-import matplotlib.pyplot as plt
 
-from pressure_analysis import (
-    read_static,
-    read_collision_events,
+from pressure_core import (
+    load_collision_events,
     compute_pressures_from_events,
-    ENC,
+    area_total,
+    steady_stats,
+    detect_equilibration,
+    analytic_c_hat,
+    build_error_curve,
+    r2_score,
 )
-from pressure_area import area_total
-
-def steady_stats(t, P_left, P_right, tmin: float = 60.0):
-    """Promedio y std en régimen (descarta t < tmin)."""
-    if len(t) == 0:
-        return np.nan, np.nan, np.nan, np.nan, np.nan, np.nan, 0
-
-    mask = (t >= tmin)
-    if not np.any(mask):
-        mask = slice(None)
-
-    Pc = 0.5 * (P_left[mask] + P_right[mask])
-    Pl = P_left[mask]
-    Pr = P_right[mask]
-
-    n = int(np.size(Pc))
-    if n >= 2:
-        P_mean      = float(np.mean(Pc))
-        P_std       = float(np.std(Pc, ddof=1))
-        P_mean_left = float(np.mean(Pl))
-        P_std_left  = float(np.std(Pl, ddof=1))
-        P_mean_right= float(np.mean(Pr))
-        P_std_right = float(np.std(Pr, ddof=1))
-    elif n == 1:
-        P_mean      = float(Pc[0]); P_std = 0.0
-        P_mean_left = float(Pl[0]); P_std_left = 0.0
-        P_mean_right= float(Pr[0]); P_std_right = 0.0
-    else:
-        P_mean=P_std=P_mean_left=P_std_left=P_mean_right=P_std_right=np.nan
-
-    return P_mean, P_std, P_mean_left, P_std_left, P_mean_right, P_std_right, n
-
-
-def analytic_c_hat(x, y):
-    """Mínimos cuadrados por el origen (no ponderado): c* = sum(xy)/sum(x^2)."""
-    x = np.asarray(x, float)
-    y = np.asarray(y, float)
-    Sxx = np.sum(x * x)
-    Sxy = np.sum(x * y)
-    c_hat = Sxy / Sxx
-    sigma_c = np.sqrt(1.0 / Sxx) 
-    return c_hat, sigma_c
-
-
-def build_error_curve(x, y, cmin=None, cmax=None, num=400):
-    """Devuelve grid de c y E(c) = sum (y - c x)^2."""
-    x = np.asarray(x, float); y = np.asarray(y, float)
-    c_auto = np.sum(x * y) / np.sum(x * x)
-    if cmin is None or cmax is None:
-        span = 3.0 * abs(c_auto) if abs(c_auto) > 0 else 1.0
-        cmin = c_auto - span
-        cmax = c_auto + span
-        if cmin == cmax:
-            cmin, cmax = c_auto - 1.0, c_auto + 1.0
-    cs = np.linspace(cmin, cmax, num)
-    E = np.array([np.sum((y - c * x) ** 2) for c in cs])
-    idx = int(np.argmin(E))
-    return cs, E, cs[idx], E[idx]
-
-
-def r2_score(y, y_pred):
-    y = np.asarray(y, float)
-    y_pred = np.asarray(y_pred, float)
-    ss_res = np.sum((y - y_pred)**2)
-    ss_tot = np.sum((y - np.mean(y))**2)
-    return 1.0 - ss_res/ss_tot if ss_tot > 0 else np.nan
-
-def main(folders, tmin: float, cmin: float|None, cmax: float|None, ngrid: int):
-    results = []  # (L, A, Ainv, Pavg, Pstd, PavgL, PstdL, PavgR, PstdR, Pavg*A, n, N, M, V)
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
+from simulation_io import read_static
 
-    for folder in folders:
-        folder = Path(folder)
-        static_path = folder / "static.txt"
-        dynamic_path = folder / "dynamic.txt"
-        if not static_path.exists() or not dynamic_path.exists():
-            raise FileNotFoundError(f"Faltan archivos en {folder}")
 
-        N, L, R, M, V, T = read_static(static_path)
-        times_ev, idx_ev, X, Y, VX, VY = read_collision_events(dynamic_path, N)
-        t, P_L, P_R = compute_pressures_from_events(times_ev, X, Y, VX, VY, N, L, R, M)
-
-        Pavg, Pstd, PavgL, PstdL, PavgR, PstdR, n = steady_stats(t, P_L, P_R, tmin=tmin)
-
-        A = area_total(L, R)
-        Ainv = 1.0 / A
-
-        results.append((L, A, Ainv, Pavg, Pstd, PavgL, PstdL, PavgR, PstdR, Pavg*A, n, N, M, V))
-
-    results.sort(key=lambda x: x[0])
-
-    Ainv_vals = np.array([r[2] for r in results], dtype=float)
-    Pavg_vals = np.array([r[3] for r in results], dtype=float)
-    Pstd_vals = np.array([r[4] for r in results], dtype=float)
-
-    cs, Ecs, c_min_grid, Emin = build_error_curve(Ainv_vals, Pavg_vals, cmin=cmin, cmax=cmax, num=ngrid)
-
-    c_hat, sigma_c = analytic_c_hat(Ainv_vals, Pavg_vals)
-
-    delta_abs = abs(c_min_grid - c_hat)
-    delta_rel = delta_abs / (abs(c_hat) if c_hat != 0 else 1.0)
-
-    y_fit = c_hat * Ainv_vals
-    R2 = r2_score(Pavg_vals, y_fit)
+def plot_regression(cs, Ecs, c_hat, Ainv_vals, Pavg_vals, Pstd_vals):
+    import matplotlib.pyplot as plt
 
     # Gráfico 1: Curva de error E(c) y mínimo (solo analítico)
     plt.figure(figsize=(7.2, 4.6))
@@ -142,16 +49,75 @@ def main(folders, tmin: float, cmin: float|None, cmax: float|None, ngrid: int):
     plt.show()
 
 
+def main(folders, tmin: float | None, cmin: float|None, cmax: float|None, ngrid: int,
+         plot: bool = True, as_json: bool = False):
+    results = []  # (L, A, Ainv, Pavg, Pstd, PavgL, PstdL, PavgR, PstdR, Pavg*A, n, t_eq, N, M, V)
+
+    for folder in folders:
+        folder = Path(folder)
+        static_path = folder / "static.txt"
+        dynamic_path = folder / "dynamic.txt"
+        if not static_path.exists() or not dynamic_path.exists():
+            raise FileNotFoundError(f"Faltan archivos en {folder}")
+
+        N, L, R, M, V, T = read_static(static_path)
+        times_ev, idx_ev, X, Y, VX, VY = load_collision_events(folder, N)
+        t, P_L, P_R = compute_pressures_from_events(times_ev, X, Y, VX, VY, N, L, R, M)
+
+        t_eq = tmin if tmin is not None else detect_equilibration(t, P_L, P_R)
+        Pavg, Pstd, PavgL, PstdL, PavgR, PstdR, n = steady_stats(t, P_L, P_R, tmin=t_eq)
+
+        A = area_total(L, R)
+        Ainv = 1.0 / A
+
+        results.append((L, A, Ainv, Pavg, Pstd, PavgL, PstdL, PavgR, PstdR, Pavg*A, n, t_eq, N, M, V))
+
+    results.sort(key=lambda x: x[0])
+
+    Ainv_vals = np.array([r[2] for r in results], dtype=float)
+    Pavg_vals = np.array([r[3] for r in results], dtype=float)
+    Pstd_vals = np.array([r[4] for r in results], dtype=float)
+
+    with stage("ajuste"):
+        cs, Ecs, c_min_grid, Emin = build_error_curve(Ainv_vals, Pavg_vals, cmin=cmin, cmax=cmax, num=ngrid)
+        c_hat, sigma_c = analytic_c_hat(Ainv_vals, Pavg_vals)
+
+    delta_abs = abs(c_min_grid - c_hat)
+    delta_rel = delta_abs / (abs(c_hat) if c_hat != 0 else 1.0)
+
+    y_fit = c_hat * Ainv_vals
+    R2 = r2_score(Pavg_vals, y_fit)
+
+    if as_json:
+        keys = ("L", "A", "A_inv", "P_mean", "P_std", "P_left_mean", "P_left_std",
+                "P_right_mean", "P_right_std", "PA", "n_bins", "t_eq", "N", "M", "V")
+        print(json.dumps({
+            "tmin": tmin, "c_hat": float(c_hat), "sigma_c": float(sigma_c), "R2": float(R2),
+            "c_grid": float(c_min_grid), "c_grid_rel_diff": float(delta_rel),
+            "runs": [dict(zip(keys, r)) for r in results],
+        }))
+    elif plot:
+        with stage("graficos"):
+            plot_regression(cs, Ecs, c_hat, Ainv_vals, Pavg_vals, Pstd_vals)
+
+
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("folders", nargs=4, help="Cuatro carpetas de simulación (una por L)")
-    ap.add_argument("--tmin", type=float, default=60.0,
-                    help="Descarta datos con t < tmin para promediar (default 40 s)")
+    ap.add_argument("--tmin", type=float, default=None,
+                    help="Descarta datos con t < tmin para promediar "
+                         "(default: equilibración detectada con MSER en cada corrida)")
     ap.add_argument("--cmin", type=float, default=None,
                     help="Límite inferior del barrido de c para la curva E(c)")
     ap.add_argument("--cmax", type=float, default=None,
                     help="Límite superior del barrido de c para la curva E(c)")
     ap.add_argument("--ngrid", type=int, default=400,
                     help="Cantidad de puntos en la grilla para E(c) (default 400)")
+    ap.add_argument("--no-plot", action="store_true", help="No abre gráficos (modo batch)")
+    ap.add_argument("--json", action="store_true",
+                    help="Imprime c*, sigma_c, R² y las estadísticas por carpeta como JSON (implica --no-plot)")
+    add_profile_arguments(ap)
     args = ap.parse_args()
-    main(args.folders, args.tmin, args.cmin, args.cmax, args.ngrid)
+    setup_profiling(args)
+    main(args.folders, args.tmin, args.cmin, args.cmax, args.ngrid,
+         plot=not args.no_plot, as_json=args.json)
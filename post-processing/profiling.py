@@ -0,0 +1,154 @@
+import atexit
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Instrumentación por etapas compartida por los scripts. Apagada, stage() devuelve
+# siempre el mismo objeto vacío, así que el costo es una llamada por bloque.
+# Se prende con --profile (ver add_arguments) o con SDS_PROFILE=1; SDS_PROFILE_CPROFILE
+# y SDS_PROFILE_TRACEMALLOC indican dónde volcar cProfile / tracemalloc.
+_ENABLED = False
+_STATS = {}  # etapa -> [llamadas, wall, cpu, items, aumento del RSS pico]
+_DUMPS = {}
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, n: int):
+        pass
+
+
+_NULL = _NullStage()
+
+
+def _rss_mib() -> float:
+    """RSS pico del proceso hasta ahora (ru_maxrss), en MiB."""
+    if resource is None:
+        return float("nan")
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB, macOS bytes
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+class _Stage:
+    __slots__ = ("name", "items", "t0", "c0", "rss0")
+
+    def __init__(self, name: str, items: int):
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        self.c0 = time.process_time()
+        self.rss0 = _rss_mib()
+        return self
+
+    def add(self, n: int):
+        """Suma ítems procesados (frames, eventos, cuadros) a la etapa."""
+        self.items += int(n)
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.t0
+        cpu = time.process_time() - self.c0
+        rec = _STATS.setdefault(self.name, [0, 0.0, 0.0, 0, 0.0])
+        rec[0] += 1
+        rec[1] += wall
+        rec[2] += cpu
+        rec[3] += self.items
+        # ru_maxrss sólo crece: lo que subió durante el bloque es memoria que la etapa
+        # llevó por encima del pico anterior del proceso (0 si no lo superó)
+        rec[4] = max(rec[4], _rss_mib() - self.rss0)
+        return False
+
+
+def stage(name: str, items: int = 0):
+    """
+    Context manager que acumula wall time, tiempo de CPU, aumento del RSS pico e
+    ítems de la etapa `name`. Las etapas pueden anidarse; cada una mide su bloque completo.
+    """
+    if not _ENABLED:
+        return _NULL
+    return _Stage(name, items)
+
+
+def enabled() -> bool:
+    return _ENABLED
+
+
+def enable(cprofile_path: str | Path | None = None, tracemalloc_path: str | Path | None = None):
+    """Prende la instrumentación; el resumen (y los volcados pedidos) salen al terminar el proceso."""
+    global _ENABLED
+    if _ENABLED:
+        return
+    _ENABLED = True
+    if cprofile_path:
+        import cProfile
+        prof = cProfile.Profile()
+        prof.enable()
+        _DUMPS["cprofile"] = (prof, Path(cprofile_path))
+    if tracemalloc_path:
+        import tracemalloc
+        tracemalloc.start()
+        _DUMPS["tracemalloc"] = (tracemalloc, Path(tracemalloc_path))
+    atexit.register(_finish)
+
+
+def summary() -> str:
+    lines = [f"{'etapa':28s} {'llamadas':>9s} {'wall (s)':>10s} {'CPU (s)':>10s} "
+             f"{'+RSS pico (MiB)':>15s} {'ítems':>10s} {'ítems/s':>12s}"]
+    for name, (calls, wall, cpu, items, rss) in _STATS.items():
+        rate = f"{items / wall:12.0f}" if items and wall > 0 else f"{'':12s}"
+        lines.append(f"{name:28s} {calls:9d} {wall:10.4f} {cpu:10.4f} {rss:15.1f} "
+                     f"{items if items else '':>10} {rate}")
+    return "\n".join(lines)
+
+
+def _finish():
+    # stderr: no se mezcla con la salida de --json
+    if "cprofile" in _DUMPS:
+        prof, path = _DUMPS["cprofile"]
+        prof.disable()
+        prof.dump_stats(path)
+        print(f"cProfile guardado en {path} (ver con: python -m pstats {path})", file=sys.stderr)
+    if "tracemalloc" in _DUMPS:
+        tracemalloc, path = _DUMPS["tracemalloc"]
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.take_snapshot().dump(str(path))
+        tracemalloc.stop()
+        print(f"tracemalloc guardado en {path} (pico {peak / 2**20:.1f} MiB)", file=sys.stderr)
+    if _STATS:
+        print("\nPerfil por etapa (las etapas anidadas también cuentan en la que las contiene):",
+              file=sys.stderr)
+        print(summary(), file=sys.stderr)
+
+
+def add_arguments(ap):
+    ap.add_argument("--profile", action="store_true",
+                    help="Al terminar, imprime en stderr tiempo, CPU, aumento del RSS pico e ítems por etapa")
+    ap.add_argument("--profile-cprofile", type=Path, default=None, metavar="ARCHIVO",
+                    help="Además vuelca un perfil de cProfile (implica --profile)")
+    ap.add_argument("--profile-tracemalloc", type=Path, default=None, metavar="ARCHIVO",
+                    help="Además vuelca un snapshot de tracemalloc (implica --profile)")
+
+
+def setup(args):
+    """Prende la instrumentación si se pidió por argumentos (ver add_arguments)."""
+    if args.profile or args.profile_cprofile or args.profile_tracemalloc:
+        enable(args.profile_cprofile, args.profile_tracemalloc)
+
+
+if os.environ.get("SDS_PROFILE") == "1":
+    enable(os.environ.get("SDS_PROFILE_CPROFILE"), os.environ.get("SDS_PROFILE_TRACEMALLOC"))
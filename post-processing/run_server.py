@@ -0,0 +1,172 @@
+import argparse
+import os
+import signal
+import sys
+import threading
+from collections import OrderedDict
+from multiprocessing.managers import BaseManager
+from pathlib import Path
+
+from simulation_io import COMPACT_MODES, RUN_SERVER_ADDRESS, read_static
+from parallel_loader import SharedRun, load_dynamic_parallel
+
+DEFAULT_ADDRESS = RUN_SERVER_ADDRESS
+AUTHKEY = b"sds-tp3"
+
+
+class RunStore:
+    """Corridas cargadas en shared memory, con política LRU y tope de memoria.
+
+    Cada corrida se identifica por la ruta absoluta de su carpeta; los clientes
+    la resuelven de su lado, porque el servidor puede tener otro directorio de
+    trabajo. Si dynamic.txt cambió desde que se cargó (mtime distinto) se vuelve a leer.
+    """
+
+    def __init__(self, max_bytes: int, workers: int | None = None,
+                 compact: str | None = None, with_vel: bool = True):
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.compact = compact
+        self.with_vel = with_vel
+        self._runs = OrderedDict()  # nombre -> (SharedRun, static, mtime)
+        self._lock = threading.Lock()
+
+    def _used(self) -> int:
+        return sum(run.nbytes for run, _, _ in self._runs.values())
+
+    def _drop(self, name: str):
+        run, _, _ = self._runs.pop(name)
+        run.close()
+        run.unlink()
+        print(f"Liberada: {name}", flush=True)
+
+    def load(self, folder: str) -> dict:
+        name = str(Path(folder).resolve())
+        dynamic_path = Path(name) / "dynamic.txt"
+        with self._lock:
+            mtime = dynamic_path.stat().st_mtime_ns
+            if name in self._runs and self._runs[name][2] != mtime:
+                self._drop(name)
+            if name not in self._runs:
+                static = read_static(Path(name) / "static.txt")
+                run = load_dynamic_parallel(dynamic_path, static[0], self.workers,
+                                            compact=self.compact, with_vel=self.with_vel)
+                self._runs[name] = (run, static, mtime)
+                print(f"Cargada: {name} ({run.nbytes / 2**20:.1f} MiB)", flush=True)
+                # Se desalojan las menos usadas; la recién cargada se conserva aunque exceda el tope
+                while self._used() > self.max_bytes and len(self._runs) > 1:
+                    self._drop(next(iter(self._runs)))
+            self._runs.move_to_end(name)
+            run, static, _ = self._runs[name]
+            return {**run.meta(), "static": static}
+
+    def evict(self, folder: str) -> bool:
+        name = str(Path(folder).resolve())
+        with self._lock:
+            if name not in self._runs:
+                return False
+            self._drop(name)
+            return True
+
+    def loaded(self) -> list:
+        with self._lock:
+            return [(name, run.nbytes) for name, (run, _, _) in self._runs.items()]
+
+    def close_all(self):
+        with self._lock:
+            for name in list(self._runs):
+                self._drop(name)
+
+
+class RunManager(BaseManager):
+    pass
+
+
+def serve(address: str, max_mb: float, workers: int | None,
+          compact: str | None = None, with_vel: bool = True):
+    if os.path.exists(address):
+        os.unlink(address)
+    store = RunStore(int(max_mb * 2**20), workers, compact, with_vel)
+    RunManager.register("store", callable=lambda: store)
+    manager = RunManager(address=address, authkey=AUTHKEY)
+    server = manager.get_server()
+    print(f"Servidor de corridas en {address} (tope {max_mb:g} MiB)", flush=True)
+    # SIGTERM (y SIGINT aunque venga ignorado desde un shell en segundo plano) liberan los segmentos
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        # El socket lo borra el propio Listener al cerrarse
+        store.close_all()
+
+
+def connect(address: str = DEFAULT_ADDRESS):
+    """Proxy al RunStore del servidor, o None si no hay servidor escuchando."""
+    if not os.path.exists(address):
+        return None
+    RunManager.register("store")
+    manager = RunManager(address=address, authkey=AUTHKEY)
+    try:
+        manager.connect()
+    except (ConnectionError, FileNotFoundError, OSError):
+        return None
+    return manager.store()
+
+
+def attach_run(folder: Path, address: str = DEFAULT_ADDRESS) -> SharedRun | None:
+    """
+    Pide al servidor la corrida de `folder` (la carga si todavía no está) y se
+    adjunta a sus segmentos sin copiar. Devuelve None si no hay servidor, para que
+    el script caiga en su lector de siempre.
+    """
+    store = connect(address)
+    if store is None:
+        return None
+    # Relativa al directorio del script, no al del servidor
+    meta = store.load(str(Path(folder).resolve()))
+    return SharedRun.attach(meta)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_serve = sub.add_parser("serve", help="Levanta el servidor (bloquea hasta Ctrl+C)")
+    p_serve.add_argument("--max-mb", type=float, default=4096.0,
+                         help="Tope de memoria para corridas cargadas (default 4096 MiB)")
+    p_serve.add_argument("--workers", type=int, default=None,
+                         help="Procesos para parsear cada corrida (default: cantidad de CPUs)")
+    p_serve.add_argument("--compact", choices=COMPACT_MODES, default=None,
+                         help="Posiciones en float32 o punto fijo int32 y velocidades en float32")
+    p_serve.add_argument("--no-vel", action="store_true",
+                         help="No guarda velocidades (alcanza para MSD y presiones)")
+
+    p_load = sub.add_parser("load", help="Precarga corridas")
+    p_load.add_argument("folders", nargs="+", type=Path)
+    p_evict = sub.add_parser("evict", help="Libera corridas")
+    p_evict.add_argument("folders", nargs="+", type=Path)
+    sub.add_parser("list", help="Lista las corridas cargadas")
+
+    ap.add_argument("--address", type=str, default=DEFAULT_ADDRESS,
+                    help="Socket Unix del servidor (default $SDS_RUN_SERVER o /tmp/sds-tp3-runs.sock)")
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        serve(args.address, args.max_mb, args.workers, args.compact, not args.no_vel)
+    else:
+        store = connect(args.address)
+        if store is None:
+            raise SystemExit(f"No hay servidor escuchando en {args.address}")
+        if args.cmd == "load":
+            for folder in args.folders:
+                meta = store.load(str(folder.resolve()))
+                print(f"{folder}: {meta['F']} frames, N = {meta['N']}")
+        elif args.cmd == "evict":
+            for folder in args.folders:
+                print(f"{folder}: {'liberada' if store.evict(str(folder.resolve())) else 'no estaba cargada'}")
+        else:
+            for name, nbytes in store.loaded():
+                print(f"{nbytes / 2**20:10.1f} MiB  {name}")
@@ -0,0 +1,364 @@
+import os
+import warnings
+from pathlib import Path
+from typing import Iterator, NamedTuple, Tuple
+
+import numpy as np
+
+from kernels import header_events
+from profiling import stage
+
+ENC = 0.09
+DEFAULT_CHUNK_FRAMES = 1024
+READ_BLOCK = 1 << 23  # 8 MiB
+BYTES_PER_LINE = 40  # "%f %f %f %f\n" con signos: para estimar cuánto leer por bloque
+RUN_SERVER_ADDRESS = os.environ.get(
+    "SDS_RUN_SERVER", os.path.join(os.environ.get("TMPDIR", "/tmp"), "sds-tp3-runs.sock")
+)
+# El motor escribe con "%f": 6 decimales, así que las posiciones son múltiplos de 1e-6 m
+POS_SCALE = 1e6
+COMPACT_MODES = ("float32", "fixed")
+
+
+class FrameChunk(NamedTuple):
+    """Bloque de frames consecutivos de dynamic.txt.
+
+    start:    índice global del primer frame del bloque
+    times:    (F,)      tiempo acumulado de cada frame
+    pos:      (F, N, 2) posiciones
+    vel:      (F, N, 2) velocidades
+    ev_frame: (E,)      frame (relativo al bloque) de cada ID listado en el encabezado
+    ev_idx:   (E,)      índice 0..N-1 de la partícula que tocó un borde
+    """
+    start: int
+    times: np.ndarray
+    pos: np.ndarray
+    vel: np.ndarray
+    ev_frame: np.ndarray
+    ev_idx: np.ndarray
+
+
+class LoadedRun(NamedTuple):
+    """Corrida completa en memoria (ver load_run).
+
+    pos es un ndarray (float64 / float32) o FixedPointPositions; vel es None si se
+    cargó sin velocidades. ev_vel (E, 2) guarda la velocidad de cada evento de borde,
+    que es lo único que necesita el cálculo de presiones.
+    """
+    times: np.ndarray
+    pos: object
+    vel: np.ndarray | None
+    ev_frame: np.ndarray
+    ev_idx: np.ndarray
+    ev_vel: np.ndarray
+
+
+class FixedPointPositions:
+    """Posiciones (F, N, 2) guardadas como int32 en micrómetros (1 / POS_SCALE m).
+
+    Es la resolución exacta del texto de dynamic.txt, así que decodificar con
+    raw / POS_SCALE reproduce bit a bit el float64 que daría parsear el archivo.
+    Indexar devuelve float64 decodificado sólo para la porción pedida, por lo que
+    el código que recorre frames (MSD, animación) la acepta como a un ndarray.
+    """
+
+    def __init__(self, raw: np.ndarray):
+        self.raw = raw
+
+    @classmethod
+    def encode(cls, pos: np.ndarray) -> "FixedPointPositions":
+        return cls(np.rint(np.asarray(pos) * POS_SCALE).astype(np.int32))
+
+    @property
+    def shape(self):
+        return self.raw.shape
+
+    @property
+    def ndim(self) -> int:
+        return self.raw.ndim
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.raw.nbytes
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __getitem__(self, key) -> np.ndarray:
+        return self.raw[key] / POS_SCALE
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        out = self.raw / POS_SCALE
+        return out if dtype is None else out.astype(dtype)
+
+
+def encode_positions(pos: np.ndarray, compact: str | None):
+    if compact is None:
+        return pos
+    if compact == "float32":
+        return pos.astype(np.float32)
+    if compact == "fixed":
+        return FixedPointPositions.encode(pos)
+    raise ValueError(f"Modo compacto desconocido: {compact!r} (opciones: {', '.join(COMPACT_MODES)})")
+
+
+def encode_velocities(vel: np.ndarray, compact: str | None) -> np.ndarray:
+    return vel if compact is None else vel.astype(np.float32)
+
+
+def read_static(static_path: Path) -> Tuple[int, float, float, float, float, float]:
+    with static_path.open("r") as f:
+        N = int(f.readline().strip())
+        L = float(f.readline().strip())
+        R = float(f.readline().strip())
+        M = float(f.readline().strip())
+        V = float(f.readline().strip())
+        T = float(f.readline().strip())
+    return N, L, R, M, V, T
+
+
+# Para parse_numbers: "d.dddddd" leído como uint64 little endian, con el punto pasado a '0'
+_DOT_TO_ZERO = np.uint64((ord(".") ^ ord("0")) << 8)
+_ASCII_ZEROS = np.uint64(0x3030303030303030)
+_ABOVE_NINE = np.uint64(0x4646464646464646)
+_HIGH_BITS = np.uint64(0x8080808080808080)
+# Combina los dígitos de a pares, de a cuatro y de a ocho
+_SWAR_STEPS = tuple((np.uint64(shift), np.uint64(scale), np.uint64(mask)) for shift, scale, mask in (
+    (8, 10, 0x00FF00FF00FF00FF), (16, 100, 0x0000FFFF0000FFFF), (32, 10000, 0x00000000FFFFFFFF)))
+
+
+def _parse_fixed6(buf: bytes) -> np.ndarray | None:
+    """
+    Camino rápido de parse_numbers para el formato "%f" del motor con |x| < 10:
+    "[-+]d.dddddd" separados por blancos. Devuelve None si algún byte no encaja.
+    """
+    if buf.translate(None, b"0123456789+-. \t\r\n"):
+        return None
+    n = len(buf)
+    b = np.full(n + 16, 32, dtype=np.uint8)
+    b[8:n + 8] = np.frombuffer(buf, dtype=np.uint8)
+    dots = np.flatnonzero(b == 46)
+    lead = b[dots - 2]
+    neg = lead == 45
+    signed = neg | (lead == 43)
+    if (b[dots + 7] > 32).any():
+        return None
+    # Ocho bytes por número ("d.dddddd", con el punto como '0') leídos como un uint64
+    words = np.ndarray((b.size - 7,), dtype="<u8", buffer=b, strides=(1,))
+    x = words[dots - 1]
+    x ^= _DOT_TO_ZERO
+    if (((x - _ASCII_ZEROS) | (x + _ABOVE_NINE)) & _HIGH_BITS).any():
+        return None
+    # Cada byte que no es blanco tiene que pertenecer a uno de estos números: así
+    # un signo o dígito de más (p. ej. "12.000000" o "1--2.000000") cae a fromstring
+    if np.count_nonzero(b > 32) != 8 * dots.size + np.count_nonzero(signed):
+        return None
+    x -= _ASCII_ZEROS
+    units = x & np.uint64(0xFF)
+    for shift, scale, mask in _SWAR_STEPS:
+        t = x >> shift
+        x *= scale
+        x += t
+        x &= mask
+    # x = d * 10**7 + decimales (el punto contó como un dígito 0)
+    units *= np.uint64(9 * 10**6)
+    x -= units
+    # Entero exacto / 1e6 exacto: IEEE redondea igual que strtod sobre el texto,
+    # y con -1e6 se conserva el signo de "-0.000000"
+    return x.astype(float) / np.where(neg, -1e6, 1e6)
+
+
+def parse_numbers(buf: bytes) -> np.ndarray:
+    """
+    Todos los números de `buf` (separados por blancos) como float64, bit a bit
+    iguales a np.fromstring(buf, sep=" "). Las líneas que escribe el motor van por
+    un camino vectorizado de punto fijo; cualquier otro formato usa np.fromstring.
+    Un token que no es un número levanta ValueError.
+    """
+    if not buf or buf.isspace():
+        return np.zeros(0)
+    vals = _parse_fixed6(buf)
+    if vals is None:
+        # NumPy < 2 corta en el primer token inválido con un DeprecationWarning en
+        # vez de fallar: se convierte en error para que ambos casos avisen igual
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", DeprecationWarning)
+                vals = np.fromstring(buf, dtype=float, sep=" ")
+        except (ValueError, DeprecationWarning) as e:
+            raise ValueError(f"Número mal formado en dynamic.txt: {e}") from e
+    return vals
+
+
+def parse_frame_bytes(buf: bytes, N: int, start: int = 0, newlines: np.ndarray | None = None) -> FrameChunk:
+    """Parsea bytes crudos que contienen frames completos (encabezado + N líneas).
+
+    Sólo los encabezados se pasan a str; las líneas de partículas se convierten de
+    una sola vez con parse_numbers, así que el costo en Python es O(frames).
+    `newlines` son las posiciones de los "\\n" de `buf`, si ya se calcularon.
+    """
+    lpf = N + 1
+    if buf and not buf.endswith(b"\n"):
+        buf += b"\n"
+        newlines = None
+    if newlines is None:
+        newlines = np.flatnonzero(np.frombuffer(buf, dtype=np.uint8) == 10)
+    if newlines.size % lpf != 0:
+        raise ValueError(f"EOF inesperado: el bloque que empieza en el frame {start} está incompleto")
+    F = newlines.size // lpf
+
+    head_end = (newlines[::lpf] + 1).tolist()
+    frame_end = (newlines[lpf - 1::lpf] + 1).tolist()
+    head_start = [0] + frame_end[:-1]
+    view = memoryview(buf)
+    heads = [str(view[a:b], "ascii") for a, b in zip(head_start, head_end)]
+    times, ev_frame, ev_idx = header_events(heads, N, start)
+
+    vals = parse_numbers(b"".join([view[a:b] for a, b in zip(head_end, frame_end)]))
+    if F == 0 or N == 0:
+        ncols = 4
+    else:
+        ncols = vals.size // (F * N)
+    if ncols not in (4, 5) or vals.size != F * N * ncols:
+        raise ValueError(f"Frames {start}..{start + F - 1}: esperaba 4 o 5 números por partícula")
+    data = vals.reshape(F, N, ncols)[:, :, ncols - 4:]
+
+    return FrameChunk(
+        start,
+        times,
+        np.ascontiguousarray(data[:, :, 0:2]),
+        np.ascontiguousarray(data[:, :, 2:4]),
+        ev_frame,
+        ev_idx,
+    )
+
+
+def parse_frame_block(lines: list, N: int, start: int = 0) -> FrameChunk:
+    """Como parse_frame_bytes, para una lista de líneas (las vacías del final se ignoran)."""
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return parse_frame_bytes("".join(lines).encode("ascii"), N, start)
+
+
+def iter_dynamic_chunks(dynamic_path: Path, N: int,
+                        chunk_frames: int = DEFAULT_CHUNK_FRAMES) -> Iterator[FrameChunk]:
+    """Recorre dynamic.txt en bloques de a lo sumo `chunk_frames` frames.
+
+    Nunca hay más de un bloque en memoria, así que sirve para corridas que no entran en RAM.
+    El archivo se lee en bytes crudos, sin armar listas de líneas.
+    """
+    with dynamic_path.open("rb") as f:
+        yield from iter_frame_chunks(f, N, chunk_frames)
+
+
+def iter_frame_chunks(f, N: int, chunk_frames: int = DEFAULT_CHUNK_FRAMES, start: int = 0,
+                      nbytes: int | None = None) -> Iterator[FrameChunk]:
+    """Como iter_dynamic_chunks, desde la posición actual de un archivo binario abierto.
+
+    Lee a lo sumo `nbytes` bytes (todo el resto si es None); `start` es el índice
+    global del primer frame, para los mensajes de error y FrameChunk.start.
+    """
+    need = max(1, chunk_frames) * (N + 1)
+    left = float("inf") if nbytes is None else nbytes
+    buf = b""
+    eof = False
+    while True:
+        with stage("lectura"):
+            newlines = np.flatnonzero(np.frombuffer(buf, dtype=np.uint8) == 10)
+            while newlines.size < need and not eof:
+                size = int(min(max(READ_BLOCK, (need - newlines.size) * BYTES_PER_LINE), left))
+                more = f.read(size) if size > 0 else b""
+                eof = not more
+                left -= len(more)
+                offset = len(buf)
+                buf += more
+                newlines = np.concatenate(
+                    (newlines, np.flatnonzero(np.frombuffer(more, dtype=np.uint8) == 10) + offset))
+            if newlines.size >= need:
+                cut = int(newlines[need - 1]) + 1
+                block, buf = buf[:cut], buf[cut:]
+                newlines = newlines[:need]
+            else:
+                # Fin del archivo (o del rango): se ignoran las líneas vacías del final
+                block, buf = buf.rstrip(), b""
+                newlines = None
+        if not block:
+            break
+        with stage("tokenizado") as st:
+            chunk = parse_frame_bytes(block, N, start, newlines)
+            st.add(len(chunk.times))
+        if len(chunk.times) == 0:
+            break
+        yield chunk
+        start += len(chunk.times)
+
+
+def load_run(dynamic_path: Path, N: int, compact: str | None = None, with_vel: bool = True,
+             chunk_frames: int = DEFAULT_CHUNK_FRAMES) -> LoadedRun:
+    """
+    Carga dynamic.txt completo. Con `compact` las posiciones quedan en float32 o en
+    punto fijo int32 (FixedPointPositions) y las velocidades en float32; con
+    with_vel=False no se guardan velocidades (salvo las de los eventos de borde).
+    Cada bloque se convierte apenas se parsea, así que nunca hay más de un bloque
+    en float64.
+    """
+    times, pos, vel, ev_frame, ev_idx, ev_vel = [], [], [], [], [], []
+    for chunk in iter_dynamic_chunks(dynamic_path, N, chunk_frames):
+        times.append(chunk.times)
+        p = encode_positions(chunk.pos, compact)
+        pos.append(p.raw if isinstance(p, FixedPointPositions) else p)
+        if with_vel:
+            vel.append(encode_velocities(chunk.vel, compact))
+        ev_frame.append(chunk.ev_frame + chunk.start)
+        ev_idx.append(chunk.ev_idx)
+        ev_vel.append(chunk.vel[chunk.ev_frame, chunk.ev_idx])
+    if not times:
+        raise ValueError("dynamic.txt no tiene frames.")
+
+    pos = np.concatenate(pos)
+    if compact == "fixed":
+        pos = FixedPointPositions(pos)
+    return LoadedRun(
+        np.concatenate(times),
+        pos,
+        np.concatenate(vel) if with_vel else None,
+        np.concatenate(ev_frame),
+        np.concatenate(ev_idx),
+        np.concatenate(ev_vel),
+    )
+
+
+def collision_events(times: np.ndarray, pos, ev_frame: np.ndarray, ev_idx: np.ndarray,
+                     ev_vel: np.ndarray):
+    """Misma salida que read_collision_events, a partir de una corrida ya cargada."""
+    xy = np.asarray(pos[ev_frame, ev_idx], dtype=float)
+    return (np.array(times[ev_frame], dtype=float),
+            np.array(ev_idx, dtype=int),
+            xy[:, 0],
+            xy[:, 1],
+            np.array(ev_vel[:, 0], dtype=float),
+            np.array(ev_vel[:, 1], dtype=float))
+
+
+def served_run(folder: Path):
+    """SharedRun de `folder` desde el servidor de corridas, o None si no está levantado
+    o no pudo cargarla.
+
+    run_server (y multiprocessing) se importa sólo si el socket existe, para no
+    sumarle tiempo de arranque a los scripts cuando no se usa.
+    """
+    if not os.path.exists(RUN_SERVER_ADDRESS):
+        return None
+    from run_server import attach_run
+    try:
+        return attach_run(folder, RUN_SERVER_ADDRESS)
+    except (ConnectionRefusedError, FileNotFoundError, KeyError) as exc:
+        # Socket viejo de un servidor caído, corrida sin archivos o segmento ya
+        # liberado: se lee el archivo. Cualquier otro error es un bug y se propaga
+        warnings.warn(f"Servidor de corridas: no se pudo cargar {folder} ({exc!r}); se lee dynamic.txt",
+                      stacklevel=2)
+        return None
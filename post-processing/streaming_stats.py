@@ -0,0 +1,180 @@
+import math
+
+import numpy as np
+
+
+class StreamingHistogram:
+    """Histograma con bordes fijos que se actualiza bloque a bloque.
+
+    Los valores fuera de [edges[0], edges[-1]] se cuentan en `under` / `over`
+    para que el total siga siendo exacto.
+    """
+
+    def __init__(self, lo: float, hi: float, nbins: int):
+        if not hi > lo:
+            raise ValueError("El histograma necesita hi > lo.")
+        self.edges = np.linspace(lo, hi, int(nbins) + 1)
+        self.counts = np.zeros(int(nbins), dtype=np.int64)
+        self.under = 0
+        self.over = 0
+
+    def update(self, values: np.ndarray):
+        v = np.asarray(values, dtype=float).ravel()
+        lo, hi = self.edges[0], self.edges[-1]
+        nb = self.counts.size
+        b = np.floor((v - lo) * (nb / (hi - lo))).astype(np.int64)
+        b[v == hi] = nb - 1
+        self.under += int(np.count_nonzero(b < 0))
+        self.over += int(np.count_nonzero(b >= nb))
+        ok = (b >= 0) & (b < nb)
+        self.counts += np.bincount(b[ok], minlength=nb)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum()) + self.under + self.over
+
+    def density(self) -> np.ndarray:
+        """Densidad normalizada sobre el total (incluye lo que cayó fuera de rango)."""
+        width = np.diff(self.edges)
+        tot = self.total
+        return self.counts / (tot * width) if tot > 0 else np.zeros_like(width)
+
+    def centers(self) -> np.ndarray:
+        return 0.5 * (self.edges[:-1] + self.edges[1:])
+
+
+class QuantileSketch:
+    """Sketch de cuantiles con error relativo acotado para valores >= 0.
+
+    Cada valor v > 0 cae en la cubeta ceil(log_gamma(v)), con
+    gamma = (1 + alpha) / (1 - alpha); el cuantil devuelto difiere del exacto en
+    a lo sumo un factor alpha relativo. La memoria crece con log(max/min) y no
+    con la cantidad de valores, y la actualización es vectorizada.
+    """
+
+    def __init__(self, alpha: float = 0.005):
+        if not 0.0 < alpha < 1.0:
+            raise ValueError("alpha debe estar en (0, 1).")
+        self.alpha = alpha
+        self.gamma = (1.0 + alpha) / (1.0 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zeros = 0
+
+    def update(self, values: np.ndarray):
+        v = np.asarray(values, dtype=float).ravel()
+        if np.any(v < 0):
+            raise ValueError("QuantileSketch sólo admite valores no negativos.")
+        pos = v[v > 0]
+        self.zeros += v.size - pos.size
+        if pos.size == 0:
+            return
+        k = np.ceil(np.log(pos) / self._log_gamma).astype(np.int64)
+        kmin, kmax = int(k.min()), int(k.max())
+        if self.counts.size == 0:
+            self.offset = kmin
+            self.counts = np.zeros(kmax - kmin + 1, dtype=np.int64)
+        else:
+            lo = min(self.offset, kmin)
+            hi = max(self.offset + self.counts.size - 1, kmax)
+            if lo != self.offset or hi != self.offset + self.counts.size - 1:
+                grown = np.zeros(hi - lo + 1, dtype=np.int64)
+                grown[self.offset - lo:self.offset - lo + self.counts.size] = self.counts
+                self.counts = grown
+                self.offset = lo
+        self.counts += np.bincount(k - self.offset, minlength=self.counts.size)
+
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Sólo se pueden combinar sketches con el mismo alpha.")
+        self.zeros += other.zeros
+        if other.counts.size == 0:
+            return
+        if self.counts.size == 0:
+            self.offset, self.counts = other.offset, other.counts.copy()
+            return
+        lo = min(self.offset, other.offset)
+        hi = max(self.offset + self.counts.size, other.offset + other.counts.size)
+        merged = np.zeros(hi - lo, dtype=np.int64)
+        merged[self.offset - lo:self.offset - lo + self.counts.size] += self.counts
+        merged[other.offset - lo:other.offset - lo + other.counts.size] += other.counts
+        self.offset, self.counts = lo, merged
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum()) + self.zeros
+
+    def quantile(self, q: float) -> float:
+        n = self.count
+        if n == 0:
+            return float("nan")
+        rank = q * (n - 1)
+        if rank < self.zeros:
+            return 0.0
+        cum = np.cumsum(self.counts) + self.zeros
+        i = int(np.searchsorted(cum, rank, side="right"))
+        i = min(i, self.counts.size - 1)
+        k = self.offset + i
+        return 2.0 * self.gamma ** k / (self.gamma + 1.0)
+
+
+class WelfordStats:
+    """Media y varianza por bin, actualizadas de a una serie con el algoritmo de Welford.
+
+    Cada update suma una realización (p. ej. una corrida) de una curva discretizada
+    en bins comunes; los NaN se ignoran, así que corridas más cortas sólo aportan a
+    sus primeros bins. La memoria es O(bins) sin importar cuántas series se sumen, y
+    dos acumuladores de procesos distintos se combinan con merge (Chan et al.).
+    """
+
+    def __init__(self, nbins: int = 0):
+        self.count = np.zeros(int(nbins), dtype=np.int64)
+        self.mean = np.zeros(int(nbins))
+        self.m2 = np.zeros(int(nbins))
+
+    def _grow(self, nbins: int):
+        extra = nbins - self.count.size
+        if extra > 0:
+            self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+            self.mean = np.concatenate([self.mean, np.zeros(extra)])
+            self.m2 = np.concatenate([self.m2, np.zeros(extra)])
+
+    @property
+    def nbins(self) -> int:
+        return self.count.size
+
+    def update(self, values: np.ndarray):
+        v = np.asarray(values, dtype=float).ravel()
+        self._grow(v.size)
+        ok = np.flatnonzero(~np.isnan(v))
+        self.count[ok] += 1
+        delta = v[ok] - self.mean[ok]
+        self.mean[ok] += delta / self.count[ok]
+        self.m2[ok] += delta * (v[ok] - self.mean[ok])
+
+    def merge(self, other: "WelfordStats"):
+        self._grow(other.nbins)
+        k = other.nbins
+        na = self.count[:k]
+        nb = other.count
+        n = na + nb
+        ok = nb > 0
+        delta = other.mean[ok] - self.mean[:k][ok]
+        self.mean[:k][ok] += delta * nb[ok] / n[ok]
+        self.m2[:k][ok] += other.m2[ok] + delta * delta * na[ok] * nb[ok] / n[ok]
+        self.count[:k] = n
+
+    def average(self) -> np.ndarray:
+        """Media por bin; NaN en bins sin ninguna serie (`mean` ahí queda en 0)."""
+        return np.where(self.count > 0, self.mean, np.nan)
+
+    def variance(self) -> np.ndarray:
+        """Varianza muestral (ddof=1); NaN en bins con menos de dos series."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    def stderr(self) -> np.ndarray:
+        """Error estándar de la media por bin."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(self.variance() / self.count)
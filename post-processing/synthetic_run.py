@@ -0,0 +1,129 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from simulation_io import ENC
+
+R_DEFAULT = 0.0015
+M_DEFAULT = 1.0
+V_DEFAULT = 0.01
+
+
+def _reflect(x, y, vx, vy, L: float, R: float):
+    """Refleja in place las partículas que salieron del recinto izquierdo o del canal."""
+    y0 = (ENC - L) / 2.0
+    y1 = y0 + L
+    chan = x >= ENC - R
+    in_mouth = (y >= y0 + R) & (y <= y1 - R)
+
+    m = x < R
+    x[m] = 2 * R - x[m]; vx[m] = -vx[m]
+    m = chan & ~in_mouth & (x < ENC)
+    x[m] = 2 * (ENC - R) - x[m]; vx[m] = -vx[m]
+    m = x > 2 * ENC - R
+    x[m] = 2 * (2 * ENC - R) - x[m]; vx[m] = -vx[m]
+
+    left = x < ENC
+    lo = np.where(left, R, y0 + R)
+    hi = np.where(left, ENC - R, y1 - R)
+    m = y < lo
+    y[m] = 2 * lo[m] - y[m]; vy[m] = -vy[m]
+    m = y > hi
+    y[m] = 2 * hi[m] - y[m]; vy[m] = -vy[m]
+    np.clip(x, R, 2 * ENC - R, out=x)
+    np.clip(y, np.where(x < ENC, R, y0 + R), np.where(x < ENC, ENC - R, y1 - R), out=y)
+
+
+def _place_on_wall(rng, x, y, vx, vy, i: int, L: float, R: float):
+    """
+    Deja la partícula i en contacto con una pared elegida al azar, con la velocidad
+    ya reflejada (alejándose de la pared), tal como la escribe el motor tras el choque.
+    """
+    y0 = (ENC - L) / 2.0
+    y1 = y0 + L
+    s = np.hypot(vx[i], vy[i])
+    a = abs(rng.normal(0.0, s / np.sqrt(2))) + 1e-6
+    b = rng.normal(0.0, s / np.sqrt(2))
+    wall = rng.integers(7)
+    if wall == 0:    # pared izquierda
+        x[i], y[i], vx[i], vy[i] = R, rng.uniform(R, ENC - R), a, b
+    elif wall == 1:  # pared derecha del recinto, fuera de la abertura
+        yy = rng.uniform(R, y0 - R) if rng.random() < 0.5 else rng.uniform(y1 + R, ENC - R)
+        x[i], y[i], vx[i], vy[i] = ENC - R, yy, -a, b
+    elif wall == 2:  # fondo del canal
+        x[i], y[i], vx[i], vy[i] = 2 * ENC - R, rng.uniform(y0 + R, y1 - R), -a, b
+    elif wall == 3:  # piso del recinto
+        x[i], y[i], vx[i], vy[i] = rng.uniform(R, ENC - R), R, b, a
+    elif wall == 4:  # techo del recinto
+        x[i], y[i], vx[i], vy[i] = rng.uniform(R, ENC - R), ENC - R, b, -a
+    elif wall == 5:  # piso del canal
+        x[i], y[i], vx[i], vy[i] = rng.uniform(ENC, 2 * ENC - R), y0 + R, b, a
+    else:            # techo del canal
+        x[i], y[i], vx[i], vy[i] = rng.uniform(ENC, 2 * ENC - R), y1 - R, b, -a
+
+
+def generate_run(folder: Path, N: int, T: int, L: float = 0.03, seed: int = 0,
+                 wall_rate: float = 0.3, mean_dt: float | None = None):
+    """
+    Escribe una corrida sintética en `folder` con el mismo formato que el motor:
+      - static.txt con N, L, R, M, V y T (cantidad de eventos),
+      - dynamic.txt con T frames "t id1 id2 ..." + N líneas "%f %f %f %f".
+    Las partículas arrancan en el recinto izquierdo con |v| = V y se mueven
+    balísticamente reflejándose en las paredes. En cada frame, con probabilidad
+    `wall_rate`, una partícula queda apoyada en una pared con la velocidad ya
+    reflejada y su ID va al encabezado, así classify_wall_and_recinto la reconoce.
+    No es dinámica de discos duros (no hay choques entre partículas): sirve para
+    medir el costo del post-procesamiento, no para validar física.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    R, M, V = R_DEFAULT, M_DEFAULT, V_DEFAULT
+    mean_dt = mean_dt if mean_dt is not None else 0.5 / max(N, 1)
+
+    with (folder / "static.txt").open("w") as f:
+        f.write(f"{N}\n{L}\n{R}\n{M}\n{V}\n{T}\n")
+
+    x = rng.uniform(R, ENC - R, N)
+    y = rng.uniform(R, ENC - R, N)
+    theta = rng.uniform(0.0, 2 * np.pi, N)
+    vx = V * np.cos(theta)
+    vy = V * np.sin(theta)
+    frame_fmt = "%f %f %f %f\n" * N
+    block = np.empty((N, 4))
+
+    t = 0.0
+    with (folder / "dynamic.txt").open("w") as f:
+        for k in range(T):
+            ids = []
+            if k > 0:
+                dt = rng.exponential(mean_dt)
+                x += vx * dt
+                y += vy * dt
+                _reflect(x, y, vx, vy, L, R)
+                t += dt
+                if N > 0 and rng.random() < wall_rate:
+                    i = int(rng.integers(N))
+                    _place_on_wall(rng, x, y, vx, vy, i, L, R)
+                    ids.append(i + 1)
+            f.write(repr(t) + "".join(f" {i}" for i in ids) + "\n")
+            block[:, 0] = x
+            block[:, 1] = y
+            block[:, 2] = vx
+            block[:, 3] = vy
+            if N > 0:
+                f.write(frame_fmt % tuple(block.ravel()))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder", type=Path, help="Carpeta donde escribir static.txt y dynamic.txt")
+    ap.add_argument("--N", type=int, default=300, help="Cantidad de partículas (default 300)")
+    ap.add_argument("--T", type=int, default=10000, help="Cantidad de eventos / frames (default 10000)")
+    ap.add_argument("--L", type=float, default=0.03, help="Abertura del canal (default 0.03)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--wall-rate", type=float, default=0.3,
+                    help="Probabilidad de un choque con pared por frame (default 0.3)")
+    args = ap.parse_args()
+    generate_run(args.folder, args.N, args.T, L=args.L, seed=args.seed, wall_rate=args.wall_rate)
+    print(f"Corrida sintética en {args.folder}: N = {args.N}, T = {args.T}, L = {args.L:g}")
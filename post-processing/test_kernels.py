@@ -0,0 +1,16 @@
+import numpy as np
+
+import kernels
+from simulation_io import read_static, load_run, collision_events
+from synthetic_run import generate_run
+
+
+def test_check_synthetic_run(tmp_path):
+    generate_run(tmp_path, N=40, T=400, seed=3)
+    # La comparación sólo dice algo si la corrida tiene choques con paredes
+    N = int(read_static(tmp_path / "static.txt")[0])
+    run = load_run(tmp_path / "dynamic.txt", N)
+    times_ev = collision_events(run.times, run.pos, run.ev_frame, run.ev_idx, run.ev_vel)[0]
+    assert np.size(times_ev) > 0
+
+    assert kernels.check(tmp_path)
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from simulation_io import _parse_fixed6, iter_dynamic_chunks, parse_frame_bytes, parse_numbers
+
+
+def bits(a):
+    return np.asarray(a, dtype=float).view(np.uint64)
+
+
+def assert_same_as_reference(buf: bytes):
+    """parse_numbers tiene que dar exactamente lo mismo que fromstring y que float()."""
+    got = parse_numbers(buf)
+    ref = np.fromstring(buf, dtype=float, sep=" ")
+    tokens = np.array([float(tok) for tok in buf.split()])
+    assert np.array_equal(bits(got), bits(ref))
+    assert np.array_equal(bits(got), bits(tokens))
+
+
+def engine_lines(rng, n):
+    # Mismo formato que escribe el motor: "%f %f %f %f" por partícula
+    vals = np.concatenate([rng.uniform(0.0, 0.09, (n, 2)), rng.normal(0.0, 0.01, (n, 2))], axis=1)
+    return "".join("%f %f %f %f\n" % tuple(row) for row in vals).encode()
+
+
+def test_engine_format():
+    buf = engine_lines(np.random.default_rng(0), 2000)
+    assert _parse_fixed6(buf) is not None  # tiene que ir por el camino rápido
+    assert_same_as_reference(buf)
+
+
+def test_signs_and_negative_zero():
+    assert_same_as_reference(b"-0.000000 0.000000 +0.000000 -1.000000 +9.999999 -9.999999\n")
+    # -0.000000 conserva el signo, igual que strtod
+    assert np.signbit(parse_numbers(b"-0.000000 0.000000\n")).tolist() == [True, False]
+
+
+@pytest.mark.parametrize("buf", [
+    b"0.1 0.25 -0.5 1.0\n",                            # menos de 6 decimales
+    b"0.1234567 -0.12345678 1.000000000000001 2.5\n",  # más de 6 decimales
+    b"12.000000 -123.456789 1000.000001 0.000000\n",   # |x| >= 10
+    b"1 -2 3 4\n",                                      # enteros
+    b"1e-3 -2.5E+02 3.000000e0 4.1e-310\n",            # exponentes
+    b"0.000000 1.000000 2.000000 3.000000\n0.1 0.2 0.3 0.4\n",  # mezcla de formatos
+])
+def test_other_formats_fall_back(buf):
+    assert_same_as_reference(buf)
+
+
+def test_crlf():
+    lf = engine_lines(np.random.default_rng(1), 50)
+    crlf = lf.replace(b"\n", b"\r\n")
+    assert_same_as_reference(crlf)
+    assert np.array_equal(bits(parse_numbers(crlf)), bits(parse_numbers(lf)))
+
+
+@pytest.mark.parametrize("buf", [
+    b"1.000000 abc\n",
+    b"1.000000 -\n",
+    b"1.0.0 2.000000\n",
+    b"--1.000000\n",
+    b"1.000000 2.00000x\n",
+    b"0.000000 1.000000 .\n",
+])
+def test_malformed_raises(buf):
+    with pytest.raises(ValueError):
+        parse_numbers(buf)
+
+
+def write_run(path, N, F):
+    rng = np.random.default_rng(2)
+    frames = []
+    for k in range(F):
+        ids = " ".join(str(i + 1) for i in rng.choice(N, 2, replace=False))
+        frames.append(f"{0.5 * k:f} {ids}\n".encode() + engine_lines(rng, N))
+    text = b"".join(frames)
+    path.write_bytes(text)
+    return text
+
+
+def load_chunks(path, N, chunk_frames):
+    chunks = list(iter_dynamic_chunks(path, N, chunk_frames))
+    return (np.concatenate([c.times for c in chunks]), np.concatenate([c.pos for c in chunks]),
+            np.concatenate([c.vel for c in chunks]), np.concatenate([c.ev_frame + c.start for c in chunks]),
+            np.concatenate([c.ev_idx for c in chunks]))
+
+
+def test_chunks_match_whole_file(tmp_path):
+    N, F = 7, 23
+    text = write_run(tmp_path / "dynamic.txt", N, F)
+    whole = parse_frame_bytes(text, N)
+    # Cortes que no coinciden con el tamaño de bloque, CRLF y sin "\n" final
+    (tmp_path / "crlf.txt").write_bytes(text.replace(b"\n", b"\r\n"))
+    (tmp_path / "noeol.txt").write_bytes(text.rstrip(b"\n"))
+    for name in ("dynamic.txt", "crlf.txt", "noeol.txt"):
+        for chunk_frames in (1, 5, 100):
+            times, pos, vel, ev_frame, ev_idx = load_chunks(tmp_path / name, N, chunk_frames)
+            assert np.array_equal(bits(times), bits(whole.times))
+            assert np.array_equal(bits(pos), bits(whole.pos))
+            assert np.array_equal(bits(vel), bits(whole.vel))
+            assert np.array_equal(ev_frame, whole.ev_frame)
+            assert np.array_equal(ev_idx, whole.ev_idx)
+
+    body = b"".join(line for k, line in enumerate(text.splitlines(keepends=True)) if k % (N + 1))
+    ref = np.fromstring(body, dtype=float, sep=" ").reshape(F, N, 4)
+    assert np.array_equal(bits(whole.pos), bits(ref[:, :, 0:2]))
+    assert np.array_equal(bits(whole.vel), bits(ref[:, :, 2:4]))
+
+
+def test_truncated_last_frame(tmp_path):
+    N = 5
+    text = write_run(tmp_path / "dynamic.txt", N, 4)
+    lines = text.splitlines(keepends=True)
+    (tmp_path / "dynamic.txt").write_bytes(b"".join(lines[:-2]))
+    with pytest.raises(ValueError, match="EOF inesperado"):
+        list(iter_dynamic_chunks(tmp_path / "dynamic.txt", N, 2))
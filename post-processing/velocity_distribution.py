@@ -0,0 +1,177 @@
+import argparse
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+
+from simulation_io import ENC, DEFAULT_CHUNK_FRAMES, read_static, iter_dynamic_chunks
+from streaming_stats import StreamingHistogram, QuantileSketch
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
+
+
+def accumulate_velocities(dynamic_path: Path, N: int, M: float, vmax: float, nbins: int = 100,
+                          tmin: float = 0.0, chunk_frames: int = DEFAULT_CHUNK_FRAMES):
+    """
+    Recorre dynamic.txt bloque a bloque y acumula:
+      - histogramas fijos de |v|, vx y vy (sólo frames con t >= tmin),
+      - un QuantileSketch de |v| para mediana y cuantiles,
+      - la temperatura cinética k_B T = M <|v|^2> / 2 (2D) por recinto en cada frame.
+    Nunca hay más de un bloque de velocidades en memoria.
+    """
+    h_speed = StreamingHistogram(0.0, vmax, nbins)
+    h_vx = StreamingHistogram(-vmax, vmax, nbins)
+    h_vy = StreamingHistogram(-vmax, vmax, nbins)
+    sketch = QuantileSketch()
+    sum_v2 = 0.0
+    n_v = 0
+
+    times_all = []
+    kT_left_all = []
+    kT_right_all = []
+
+    for chunk in iter_dynamic_chunks(dynamic_path, N, chunk_frames):
+        v2 = np.einsum("fni,fni->fn", chunk.vel, chunk.vel)
+        left = chunk.pos[:, :, 0] < ENC
+        nL = left.sum(axis=1)
+        nR = N - nL
+        with np.errstate(invalid="ignore", divide="ignore"):
+            kT_left_all.append(0.5 * M * np.where(left, v2, 0.0).sum(axis=1) / nL)
+            kT_right_all.append(0.5 * M * np.where(left, 0.0, v2).sum(axis=1) / nR)
+        times_all.append(chunk.times)
+
+        keep = chunk.times >= tmin
+        if not np.any(keep):
+            continue
+        speeds = np.sqrt(v2[keep])
+        h_speed.update(speeds)
+        h_vx.update(chunk.vel[keep, :, 0])
+        h_vy.update(chunk.vel[keep, :, 1])
+        sketch.update(speeds)
+        sum_v2 += float(v2[keep].sum())
+        n_v += speeds.size
+
+    if not times_all:
+        raise ValueError("dynamic.txt no tiene frames.")
+
+    kT_mean = 0.5 * M * sum_v2 / n_v if n_v > 0 else np.nan
+    return (h_speed, h_vx, h_vy, sketch, kT_mean,
+            np.concatenate(times_all), np.concatenate(kT_left_all), np.concatenate(kT_right_all))
+
+
+def maxwell_speed_pdf(v: np.ndarray, M: float, kT: float) -> np.ndarray:
+    a = M / kT
+    return a * v * np.exp(-0.5 * a * v * v)
+
+
+def maxwell_component_pdf(u: np.ndarray, M: float, kT: float) -> np.ndarray:
+    a = M / kT
+    return np.sqrt(a / (2.0 * np.pi)) * np.exp(-0.5 * a * u * u)
+
+
+def plot_velocities(h_speed, h_vx, h_vy, M, kT, times, kT_L, kT_R):
+    import matplotlib.pyplot as plt
+
+    # Gráfico 1: distribución de rapideces vs Maxwell-Boltzmann
+    vs = h_speed.centers()
+    plt.figure(figsize=(7.8, 5.4))
+    plt.bar(vs, h_speed.density(), width=np.diff(h_speed.edges), alpha=0.5, color="C0", label="Simulación")
+    plt.plot(vs, maxwell_speed_pdf(vs, M, kT), "-", lw=2.0, color="C1", label="Maxwell-Boltzmann")
+    plt.xlabel("|v| (m/s)", fontsize=16)
+    plt.ylabel("Densidad", fontsize=16)
+    plt.tick_params(axis="both", labelsize=13)
+    plt.grid(True, ls=":", alpha=0.5)
+    plt.legend(fontsize=14)
+    plt.tight_layout()
+    plt.show()
+
+    # Gráfico 2: componentes vx, vy
+    us = h_vx.centers()
+    plt.figure(figsize=(7.8, 5.4))
+    plt.step(us, h_vx.density(), where="mid", lw=1.4, color="C0", label="$v_x$")
+    plt.step(us, h_vy.density(), where="mid", lw=1.4, color="C2", label="$v_y$")
+    plt.plot(us, maxwell_component_pdf(us, M, kT), "--", lw=2.0, color="C1", label="Gaussiana")
+    plt.xlabel("Componente de velocidad (m/s)", fontsize=16)
+    plt.ylabel("Densidad", fontsize=16)
+    plt.tick_params(axis="both", labelsize=13)
+    plt.grid(True, ls=":", alpha=0.5)
+    plt.legend(fontsize=14)
+    plt.tight_layout()
+    plt.show()
+
+    # Gráfico 3: temperatura cinética por recinto
+    plt.figure(figsize=(12, 6))
+    plt.plot(times, kT_L, lw=1.2, color="C0", label="Recinto izquierdo")
+    plt.plot(times, kT_R, lw=1.2, color="C1", label="Recinto derecho (canal)")
+    plt.xlabel("Tiempo (s)", fontsize=20)
+    plt.ylabel("$k_B T$ (J)", fontsize=20)
+    plt.legend(fontsize=20, frameon=False)
+    plt.grid(True, ls=":", alpha=0.6)
+    plt.tick_params(axis="both", labelsize=20)
+    plt.tight_layout()
+    plt.show()
+
+
+def main(folder: Path, tmin: float, nbins: int, vmax_factor: float, chunk_frames: int,
+         plot: bool = True, as_json: bool = False):
+    static_path = folder / "static.txt"
+    dynamic_path = folder / "dynamic.txt"
+
+    if not static_path.exists() or not dynamic_path.exists():
+        raise FileNotFoundError(f"Faltan static.txt o dynamic.txt en {folder}")
+
+    N, L, R, M, V, T = read_static(static_path)
+    vmax = vmax_factor * V
+    h_speed, h_vx, h_vy, sketch, kT, times, kT_L, kT_R = accumulate_velocities(
+        dynamic_path, N, M, vmax, nbins=nbins, tmin=tmin, chunk_frames=chunk_frames
+    )
+
+    q25, q50, q75 = (sketch.quantile(q) for q in (0.25, 0.5, 0.75))
+
+    np.savez(folder / "velocity_hist.npz",
+             speed_edges=h_speed.edges, speed_counts=h_speed.counts,
+             comp_edges=h_vx.edges, vx_counts=h_vx.counts, vy_counts=h_vy.counts)
+
+    out_csv = folder / "temperature.csv"
+    with out_csv.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["t", "kT_left", "kT_right"])
+        for tc, a, b in zip(times, kT_L, kT_R):
+            w.writerow([f"{tc:.6f}", f"{a:.8e}", f"{b:.8e}"])
+
+    if as_json:
+        print(json.dumps({
+            "folder": str(folder), "N": N, "L": L, "tmin": tmin, "kT": kT,
+            "speed_q25": q25, "speed_median": q50, "speed_q75": q75,
+            "speed_over_range": h_speed.over,
+        }))
+        return
+
+    print(f"k_B T (t >= {tmin:g} s): {kT:.6e} J")
+    print(f"|v| cuantiles 25/50/75: {q25:.6e} {q50:.6e} {q75:.6e} m/s")
+    if h_speed.over > 0:
+        print(f"Aviso: {h_speed.over} velocidades superan vmax = {vmax:g} m/s")
+    print(f"Guardado: {out_csv}")
+    if plot:
+        with stage("graficos"):
+            plot_velocities(h_speed, h_vx, h_vy, M, kT, times, kT_L, kT_R)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder", type=Path, help="Carpeta con static.txt y dynamic.txt")
+    ap.add_argument("--tmin", type=float, default=0.0,
+                    help="Descarta frames con t < tmin en los histogramas (default 0 s)")
+    ap.add_argument("--nbins", type=int, default=100)
+    ap.add_argument("--vmax-factor", type=float, default=5.0,
+                    help="Rango del histograma en unidades de la velocidad inicial V (default 5)")
+    ap.add_argument("--chunk-frames", type=int, default=DEFAULT_CHUNK_FRAMES,
+                    help="Frames leídos por bloque (acota la memoria usada)")
+    ap.add_argument("--no-plot", action="store_true", help="No abre gráficos (modo batch)")
+    ap.add_argument("--json", action="store_true",
+                    help="Imprime k_B T y cuantiles de |v| como JSON (implica --no-plot)")
+    add_profile_arguments(ap)
+    args = ap.parse_args()
+    setup_profiling(args)
+    main(args.folder, args.tmin, args.nbins, args.vmax_factor, args.chunk_frames,
+         plot=not args.no_plot, as_json=args.json)
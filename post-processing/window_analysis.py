@@ -0,0 +1,148 @@
+import argparse
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+
+from simulation_io import COMPACT_MODES, read_static, load_run, collision_events, served_run
+from diffusion_core import compute_msd, sliding_slope_origin
+from pressure_core import compute_pressures_from_events, detect_equilibration, sliding_mean_std
+from profiling import add_arguments as add_profile_arguments, setup as setup_profiling, stage
+
+
+def diffusion_windows(times_abs: np.ndarray, positions, t0: float, width: float, dim: int = 2):
+    """
+    D sobre cada ventana de lag [tau_i, tau_i + width] del MSD con referencia en t0.
+    Sólo se devuelven ventanas completas. Devuelve (tau_start, D, puntos por ventana).
+    """
+    i0 = int(np.searchsorted(times_abs, t0, side="left"))
+    if i0 >= len(times_abs):
+        raise ValueError(f"No hay frames con t >= t0 = {t0:g} s")
+    tau = times_abs[i0:] - times_abs[i0]
+    msd = compute_msd(positions, ref_index=i0)[i0:]
+    x, a, _, n = sliding_slope_origin(tau, msd, width)
+    full = x + width <= tau[-1]
+    return x[full], a[full] / (2.0 * float(dim)), n[full]
+
+
+def pressure_windows(t: np.ndarray, P_L: np.ndarray, P_R: np.ndarray, width: float):
+    """Promedio y std de la presión (media de ambos recintos) por ventana [t_i, t_i + width]."""
+    Pc = 0.5 * (P_L + P_R)
+    ts, mean, std, n = sliding_mean_std(t, Pc, width)
+    _, mean_L, _, _ = sliding_mean_std(t, P_L, width)
+    _, mean_R, _, _ = sliding_mean_std(t, P_R, width)
+    full = ts + width <= t[-1]
+    return ts[full], mean[full], std[full], mean_L[full], mean_R[full], n[full]
+
+
+def plot_windows(tau, D, tP, P, P_std, P_L, P_R, t_eq):
+    import matplotlib.pyplot as plt
+
+    # Gráfico 1: D por ventana de lag
+    plt.figure(figsize=(12, 6))
+    plt.plot(tau, D, lw=2.0, color="C0")
+    plt.xlabel("Inicio de la ventana de lag (s)", fontsize=20)
+    plt.ylabel("D (m$^2$/s)", fontsize=20)
+    plt.grid(True, ls=":", alpha=0.6)
+    plt.tick_params(axis="both", labelsize=20)
+    plt.tight_layout()
+    plt.show()
+
+    # Gráfico 2: presión por ventana y equilibración detectada
+    plt.figure(figsize=(12, 6))
+    plt.fill_between(tP, P - P_std, P + P_std, color="k", alpha=0.15, lw=0)
+    plt.plot(tP, P, lw=2.0, color="k", label="Promedio")
+    plt.plot(tP, P_L, lw=1.2, color="C0", label="Recinto izquierdo")
+    plt.plot(tP, P_R, lw=1.2, color="C1", label="Recinto derecho (canal)")
+    plt.axvline(x=t_eq, color="k", linestyle="--", linewidth=1.2, alpha=0.8)
+    plt.xlabel("Inicio de la ventana (s)", fontsize=20)
+    plt.ylabel("Presión (Pa$\\cdot$m)", fontsize=20)
+    plt.legend(fontsize=20, frameon=False)
+    plt.grid(True, ls=":", alpha=0.6)
+    plt.tick_params(axis="both", labelsize=20)
+    plt.tight_layout()
+    plt.show()
+
+
+def main(folder: Path, width_d: float, width_p: float, t0: float | None, dim: int,
+         compact: str | None = None, plot: bool = True, as_json: bool = False):
+    static_path = folder / "static.txt"
+    dynamic_path = folder / "dynamic.txt"
+
+    if not static_path.exists() or not dynamic_path.exists():
+        raise FileNotFoundError(f"Faltan static.txt o dynamic.txt en {folder}")
+
+    N, L, R, M, V, T = read_static(static_path)
+
+    # Una sola lectura de dynamic.txt alimenta MSD y presiones
+    served = served_run(folder)
+    run = served if served is not None else load_run(dynamic_path, N, compact=compact, with_vel=False)
+    try:
+        times_ev, _, X, Y, VX, VY = collision_events(run.times, run.pos, run.ev_frame, run.ev_idx, run.ev_vel)
+        t, P_L, P_R = compute_pressures_from_events(times_ev, X, Y, VX, VY, N, L, R, M)
+        t, P_L, P_R = t[:-1], P_L[:-1], P_R[:-1]
+        t_eq = detect_equilibration(t, P_L, P_R)
+        t_ref = t_eq if t0 is None else t0
+        with stage("ventanas"):
+            tau, D, nD = diffusion_windows(run.times, run.pos, t_ref, width_d, dim)
+    finally:
+        if served is not None:
+            served.close()
+
+    with stage("ventanas"):
+        tP, P, P_std, PL_w, PR_w, nP = pressure_windows(t, P_L, P_R, width_p)
+
+    out_D = folder / "window_D.csv"
+    with out_D.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["tau_start", "tau_end", "D", "n"])
+        for ts, d, n in zip(tau, D, nD):
+            w.writerow([f"{ts:.6f}", f"{ts + width_d:.6f}", f"{d:.8e}", int(n)])
+
+    out_P = folder / "window_P.csv"
+    with out_P.open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["t_start", "t_end", "P", "P_std", "P_left", "P_right", "n_bins"])
+        for ts, p, s, pl, pr, n in zip(tP, P, P_std, PL_w, PR_w, nP):
+            w.writerow([f"{ts:.6f}", f"{ts + width_p:.6f}", f"{p:.8e}", f"{s:.8e}",
+                        f"{pl:.8e}", f"{pr:.8e}", int(n)])
+
+    if as_json:
+        print(json.dumps({
+            "folder": str(folder), "N": N, "L": L, "t_eq": t_eq, "t0": t_ref,
+            "width_D": width_d, "width_P": width_p,
+            "tau_start": tau.tolist(), "D": D.tolist(),
+            "t_start": tP.tolist(), "P": P.tolist(), "P_std": P_std.tolist(),
+        }))
+        return
+
+    print(f"Equilibración detectada (MSER): t = {t_eq:.3f} s")
+    print(f"MSD con referencia en t0 = {t_ref:.3f} s, {tau.size} ventanas de {width_d:g} s")
+    print(f"Guardado: {out_D}")
+    print(f"Guardado: {out_P}")
+    if plot:
+        with stage("graficos"):
+            plot_windows(tau, D, tP, P, P_std, PL_w, PR_w, t_eq)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder", type=Path, help="Carpeta con static.txt y dynamic.txt")
+    ap.add_argument("--width-d", type=float, default=19.0,
+                    help="Ancho de la ventana de lag para ajustar D (default 19 s, como --tmin 1 --tmax 20)")
+    ap.add_argument("--width-p", type=float, default=20.0,
+                    help="Ancho de la ventana para promediar la presión (default 20 s)")
+    ap.add_argument("--t0", type=float, default=None,
+                    help="Referencia del MSD (default: equilibración detectada)")
+    ap.add_argument("--dim", type=int, default=2)
+    ap.add_argument("--compact", choices=COMPACT_MODES, default=None,
+                    help="Guarda las posiciones en float32 o en punto fijo int32 (menos memoria)")
+    ap.add_argument("--no-plot", action="store_true", help="No abre gráficos (modo batch)")
+    ap.add_argument("--json", action="store_true",
+                    help="Imprime t_eq y las curvas D / P por ventana como JSON (implica --no-plot)")
+    add_profile_arguments(ap)
+    args = ap.parse_args()
+    setup_profiling(args)
+    main(args.folder, args.width_d, args.width_p, args.t0, args.dim, args.compact,
+         plot=not args.no_plot, as_json=args.json)
@@ -2,26 +2,148 @@ package simulations;
 
 import java.io.IOException;
 import java.io.BufferedWriter;
+import java.nio.channels.FileChannel;
 import java.nio.file.Files;
 import java.nio.file.Path;
+import java.nio.file.StandardOpenOption;
+import java.util.ArrayList;
+import java.util.Comparator;
 import java.util.List;
 import java.util.Locale;
+import java.util.Random;
+import java.util.stream.Stream;
 
 public class App {
     private static final String SIMULATIONS_FOLDER = "simulations";
     private static final String BASE_PATH = "data";
+    private static final int DEFAULT_CHECKPOINT_EVERY = 10000;
 
     public static void main(String[] args) throws IOException {
+        run(Path.of(BASE_PATH, SIMULATIONS_FOLDER), args);
+    }
+
+    // Mismos argumentos que main, con las corridas bajo simulationsRoot (los tests usan una carpeta temporal)
+    static void run(Path simulationsRoot, String[] args) throws IOException {
         Locale.setDefault(Locale.US);
+        if (args.length > 0 && args[0].equals("--resume")) {
+            resume(simulationsRoot, args);
+            return;
+        }
         final String simulationName = args[0];
         final int N = Integer.parseInt(args[1]);
         final double L = Double.parseDouble(args[2]);
         final int T = Integer.parseInt(args[3]);
-        final Path simulationPath = Path.of(BASE_PATH, SIMULATIONS_FOLDER, simulationName);
+        final long seed = parseOption(args, "--seed", new Random().nextLong());
+        final int checkpointEvery = (int) parseOption(args, "--checkpoint-every", DEFAULT_CHECKPOINT_EVERY);
+        final Path simulationPath = simulationsRoot.resolve(simulationName);
         Files.createDirectories(simulationPath);
-        final Path staticFile = simulationPath.resolve("static.txt");
+        // Checkpoints de una corrida anterior con el mismo nombre ya no corresponden
+        deleteCheckpoints(simulationPath);
 
         System.out.printf("%s %d %.2f%n", simulationName, N, L);
+        writeStatic(simulationPath, N, L, T);
+
+        final Grid grid = new Grid(N, L, Particle.R_DEFAULT, new Random(seed));
+        final Path dynamicFile = simulationPath.resolve("dynamic.txt");
+        try (var writer = Files.newBufferedWriter(dynamicFile)) {
+            writeFrame(grid, writer, 0, grid.getParticlesInBorder());
+            maybeCheckpoint(grid, writer, simulationPath, seed, 1, T, 0, checkpointEvery);
+            simulate(grid, writer, simulationPath, seed, 1, T, 0, checkpointEvery);
+        }
+        System.out.printf("Simulacion %s generada con éxito.%nN = %d, L = %.2f, T = %d%n", simulationName, N, L, T);
+    }
+
+    // --resume <nombre> <T>: sigue desde el ultimo checkpoint hasta completar T eventos
+    private static void resume(Path simulationsRoot, String[] args) throws IOException {
+        final String simulationName = args[1];
+        final int T = Integer.parseInt(args[2]);
+        final int checkpointEvery = (int) parseOption(args, "--checkpoint-every", DEFAULT_CHECKPOINT_EVERY);
+        final Path simulationPath = simulationsRoot.resolve(simulationName);
+        final Checkpoint checkpoint = Checkpoint.read(Checkpoint.latest(simulationPath));
+        if (T <= checkpoint.events()) {
+            throw new IllegalArgumentException(String.format(
+                    "El ultimo checkpoint de %s ya tiene %d eventos (T pedido = %d)", simulationName,
+                    checkpoint.events(), T));
+        }
+
+        // Descarta lo escrito despues del checkpoint (p. ej. si el proceso murio) y sigue agregando
+        final Path dynamicFile = simulationPath.resolve("dynamic.txt");
+        if (Files.size(dynamicFile) < checkpoint.dynamicBytes()) {
+            throw new IllegalStateException("dynamic.txt es mas corto que lo registrado en el checkpoint");
+        }
+        try (var channel = FileChannel.open(dynamicFile, StandardOpenOption.WRITE)) {
+            channel.truncate(checkpoint.dynamicBytes());
+        }
+        writeStatic(simulationPath, checkpoint.N(), checkpoint.L(), T);
+
+        System.out.printf("Reanudando %s desde el evento %d (t = %f)%n", simulationName, checkpoint.events(),
+                checkpoint.time());
+        final Grid grid = checkpoint.toGrid();
+        try (var writer = Files.newBufferedWriter(dynamicFile, StandardOpenOption.APPEND)) {
+            simulate(grid, writer, simulationPath, checkpoint.seed(), checkpoint.events(), T, checkpoint.time(),
+                    checkpointEvery);
+        }
+        System.out.printf("Simulacion %s extendida con éxito.%nN = %d, L = %.2f, T = %d%n", simulationName,
+                checkpoint.N(), checkpoint.L(), T);
+    }
+
+    // Escribe los frames from..T-1; from es la cantidad de frames que ya tiene dynamic.txt
+    private static void simulate(Grid grid, BufferedWriter writer, Path simulationPath, long seed, int from, int T,
+            double tAccum, int checkpointEvery) throws IOException {
+        List<Particle> borderParticles = new ArrayList<>();
+        for (int i = from; i < T; i++) {
+            borderParticles.clear();
+            List<Event> events = grid.getNextEvents();
+            double dt = events.get(0).getTime();
+            grid.move(dt);
+            for (Event event : events) {
+                if (EventType.WALL_COLLISION.equals(event.getEventType()) || event.getParticle().isFixed()
+                        || ((ParticleCollisionEvent) event).getOther().isFixed()) {
+                    borderParticles.add(event.getParticle());
+                }
+                event.processEvent();
+            }
+            grid.clampAll();
+            tAccum += dt;
+            writeFrame(grid, writer, tAccum, borderParticles);
+            maybeCheckpoint(grid, writer, simulationPath, seed, i + 1, T, tAccum, checkpointEvery);
+        }
+    }
+
+    // Cada checkpointEvery frames y siempre al final (para poder extender la corrida); 0 los desactiva
+    private static void maybeCheckpoint(Grid grid, BufferedWriter writer, Path simulationPath, long seed,
+            int events, int T, double tAccum, int checkpointEvery) throws IOException {
+        if (checkpointEvery <= 0 || (events % checkpointEvery != 0 && events != T)) {
+            return;
+        }
+        writer.flush();
+        final long dynamicBytes = Files.size(simulationPath.resolve("dynamic.txt"));
+        Checkpoint.of(grid, seed, events, tAccum, dynamicBytes).write(simulationPath);
+    }
+
+    private static void deleteCheckpoints(Path simulationPath) throws IOException {
+        final Path folder = simulationPath.resolve(Checkpoint.FOLDER);
+        if (!Files.isDirectory(folder)) {
+            return;
+        }
+        try (Stream<Path> files = Files.walk(folder)) {
+            for (Path f : files.sorted(Comparator.reverseOrder()).toList()) {
+                Files.delete(f);
+            }
+        }
+    }
+
+    private static long parseOption(String[] args, String name, long defaultValue) {
+        for (int i = 0; i < args.length - 1; i++) {
+            if (args[i].equals(name)) {
+                return Long.parseLong(args[i + 1]);
+            }
+        }
+        return defaultValue;
+    }
+
+    private static void writeStatic(Path simulationPath, int N, double L, int T) throws IOException {
+        final Path staticFile = simulationPath.resolve("static.txt");
         try (var writer = Files.newBufferedWriter(staticFile)) {
             writer.write(String.valueOf(N));
             writer.newLine();
@@ -36,41 +158,16 @@ public class App {
             writer.write(String.valueOf(T));
             writer.newLine();
         }
+    }
 
-        final Grid grid = new Grid(N, L, Particle.R_DEFAULT);
-        final Path dynamicFile = simulationPath.resolve("dynamic.txt");
-        double tAccum = 0;
-        try (var writer = Files.newBufferedWriter(dynamicFile)) {
-            List<Particle> borderParticles = grid.getParticlesInBorder();
-            writer.write(String.valueOf(tAccum));
-            for (Particle p : borderParticles) {
-                writer.write(" " + p.getId());
-            }
-            writer.newLine();
-            writeNonFixedParticles(grid, writer);
-            for (int i = 1; i < T; i++) {
-                borderParticles.clear();
-                List<Event> events = grid.getNextEvents();
-                double dt = events.get(0).getTime();
-                grid.move(dt);
-                for (Event event : events) {
-                    if (EventType.WALL_COLLISION.equals(event.getEventType()) || event.getParticle().isFixed()
-                            || ((ParticleCollisionEvent) event).getOther().isFixed()) {
-                        borderParticles.add(event.getParticle());
-                    }
-                    event.processEvent();
-                }
-                grid.clampAll();
-                tAccum += dt;
-                writer.write(String.valueOf(tAccum));
-                for (Particle p : borderParticles) {
-                    writer.write(" " + p.getId());
-                }
-                writer.newLine();
-                writeNonFixedParticles(grid, writer);
-            }
+    private static void writeFrame(Grid grid, BufferedWriter writer, double tAccum, List<Particle> borderParticles)
+            throws IOException {
+        writer.write(String.valueOf(tAccum));
+        for (Particle p : borderParticles) {
+            writer.write(" " + p.getId());
         }
-        System.out.printf("Simulacion %s generada con éxito.%nN = %d, L = %.2f, T = %d%n", simulationName, N, L, T);
+        writer.newLine();
+        writeNonFixedParticles(grid, writer);
     }
 
     private static void writeNonFixedParticles(Grid grid, BufferedWriter writer) throws IOException {
@@ -0,0 +1,120 @@
+package simulations;
+
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.IOException;
+import java.nio.file.Files;
+import java.nio.file.NoSuchFileException;
+import java.nio.file.Path;
+import java.nio.file.StandardCopyOption;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.stream.Stream;
+
+/*
+ * Estado completo de la simulacion despues de escribir `events` frames en dynamic.txt.
+ * Formato binario big-endian (DataOutputStream):
+ *   int magic, int version, int N, double L, long seed, int events, double time,
+ *   long dynamicBytes, int cantidad de particulas,
+ *   y por particula: int id, boolean fixed, double r, m, x, y, vx, vy.
+ * dynamicBytes es el largo de dynamic.txt en ese momento: al reanudar se trunca ahi
+ * (descarta frames escritos despues del checkpoint) y se sigue agregando.
+ * La semilla sirve para reproducir la corrida desde cero: el RNG solo se usa al
+ * ubicar las particulas, asi que continuar depende unicamente de posiciones y velocidades.
+ */
+public record Checkpoint(int N, double L, long seed, int events, double time, long dynamicBytes,
+        List<Particle> particles) {
+    public static final String FOLDER = "checkpoints";
+    private static final int MAGIC = 0x53445343; // "SDSC"
+    private static final int VERSION = 1;
+
+    public static Checkpoint of(Grid grid, long seed, int events, double time, long dynamicBytes) {
+        List<Particle> particles = new ArrayList<>();
+        for (Particle p : grid) {
+            particles.add(p);
+        }
+        return new Checkpoint(grid.getN(), grid.getL(), seed, events, time, dynamicBytes, particles);
+    }
+
+    public Grid toGrid() {
+        return new Grid(N, L, particles);
+    }
+
+    public Path write(Path simulationPath) throws IOException {
+        final Path folder = simulationPath.resolve(FOLDER);
+        Files.createDirectories(folder);
+        final Path target = folder.resolve(String.format("ckpt_%09d.bin", events));
+        final Path tmp = folder.resolve(target.getFileName() + ".tmp");
+        try (var out = new DataOutputStream(new BufferedOutputStream(Files.newOutputStream(tmp)))) {
+            out.writeInt(MAGIC);
+            out.writeInt(VERSION);
+            out.writeInt(N);
+            out.writeDouble(L);
+            out.writeLong(seed);
+            out.writeInt(events);
+            out.writeDouble(time);
+            out.writeLong(dynamicBytes);
+            out.writeInt(particles.size());
+            for (Particle p : particles) {
+                out.writeInt(p.getId());
+                out.writeBoolean(p.isFixed());
+                out.writeDouble(p.getR());
+                out.writeDouble(p.getM());
+                out.writeDouble(p.getX());
+                out.writeDouble(p.getY());
+                out.writeDouble(p.getVx());
+                out.writeDouble(p.getVy());
+            }
+        }
+        // Si el proceso muere a mitad de la escritura, el checkpoint anterior sigue intacto
+        Files.move(tmp, target, StandardCopyOption.REPLACE_EXISTING, StandardCopyOption.ATOMIC_MOVE);
+        return target;
+    }
+
+    public static Checkpoint read(Path file) throws IOException {
+        try (var in = new DataInputStream(new BufferedInputStream(Files.newInputStream(file)))) {
+            if (in.readInt() != MAGIC) {
+                throw new IOException("No es un checkpoint: " + file);
+            }
+            final int version = in.readInt();
+            if (version != VERSION) {
+                throw new IOException("Version de checkpoint no soportada (" + version + "): " + file);
+            }
+            final int N = in.readInt();
+            final double L = in.readDouble();
+            final long seed = in.readLong();
+            final int events = in.readInt();
+            final double time = in.readDouble();
+            final long dynamicBytes = in.readLong();
+            final int count = in.readInt();
+            final List<Particle> particles = new ArrayList<>(count);
+            for (int i = 0; i < count; i++) {
+                final int id = in.readInt();
+                final boolean fixed = in.readBoolean();
+                final double r = in.readDouble();
+                final double m = in.readDouble();
+                final double x = in.readDouble();
+                final double y = in.readDouble();
+                final double vx = in.readDouble();
+                final double vy = in.readDouble();
+                particles.add(new Particle(id, r, m, x, y, vx, vy, fixed));
+            }
+            return new Checkpoint(N, L, seed, events, time, dynamicBytes, particles);
+        }
+    }
+
+    public static Path latest(Path simulationPath) throws IOException {
+        final Path folder = simulationPath.resolve(FOLDER);
+        if (!Files.isDirectory(folder)) {
+            throw new NoSuchFileException(folder.toString(), null, "no hay checkpoints");
+        }
+        try (Stream<Path> files = Files.list(folder)) {
+            return files
+                    .filter(f -> f.getFileName().toString().matches("ckpt_\\d+\\.bin"))
+                    .max(Path::compareTo)
+                    .orElseThrow(() -> new NoSuchFileException(folder.toString(), null, "no hay checkpoints"));
+        }
+    }
+}
@@ -6,6 +6,7 @@ import java.util.Iterator;
 import java.util.List;
 import java.util.Map;
 import java.util.PriorityQueue;
+import java.util.Random;
 
 public class Grid implements Iterable<Particle> {
     private static final double ENCLOSURE_LONG = 0.09;
@@ -18,6 +19,10 @@ public class Grid implements Iterable<Particle> {
     private final List<Particle> particles = new ArrayList<>();
 
     public Grid(int N, double L, double r) {
+        this(N, L, r, new Random());
+    }
+
+    public Grid(int N, double L, double r, Random rng) {
         this.L = L;
         this.N = N;
         this.channelBelow = (ENCLOSURE_LONG - L) / 2;
@@ -26,15 +31,15 @@ public class Grid implements Iterable<Particle> {
             double x = 0, y = 0;
             boolean flag = false;
             while (!flag) {
-                double cx = Math.random() * (ENCLOSURE_LONG - 2 * r) + r;
-                double cy = Math.random() * (ENCLOSURE_LONG - 2 * r) + r;
+                double cx = rng.nextDouble() * (ENCLOSURE_LONG - 2 * r) + r;
+                double cy = rng.nextDouble() * (ENCLOSURE_LONG - 2 * r) + r;
                 flag = particles.stream().noneMatch(p -> p.isInside(cx, cy));
                 if (flag) {
                     x = cx;
                     y = cy;
                 }
             }
-            double theta = Math.random() * 2 * Math.PI;
+            double theta = rng.nextDouble() * 2 * Math.PI;
             particles.add(new Particle(x, y, theta));
         }
         // Agrego los obstaculos
@@ -42,6 +47,23 @@ public class Grid implements Iterable<Particle> {
         particles.add(new Particle(ENCLOSURE_LONG, channelAbove));
     }
 
+    public Grid(int N, double L, List<Particle> particles) {
+        // Para restaurar desde un checkpoint (incluye los obstaculos)
+        this.L = L;
+        this.N = N;
+        this.channelBelow = (ENCLOSURE_LONG - L) / 2;
+        this.channelAbove = channelBelow + L;
+        this.particles.addAll(particles);
+    }
+
+    public int getN() {
+        return N;
+    }
+
+    public double getL() {
+        return L;
+    }
+
     private boolean inBox(final Particle p) {
         return (p.getX() >= 0 - EPS && p.getX() <= ENCLOSURE_LONG + EPS)
                 && (p.getY() >= 0 - EPS && p.getY() <= ENCLOSURE_LONG + EPS);
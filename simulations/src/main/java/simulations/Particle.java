@@ -25,6 +25,19 @@ public class Particle {
         this.vy = v * Math.sin(theta);
     }
 
+    public Particle(int id, double r, double m, double x, double y, double vx, double vy, boolean fixed) {
+        // Para restaurar desde un checkpoint: conserva el ID y el estado exactos
+        this.id = id;
+        this.r = r;
+        this.m = m;
+        this.x = x;
+        this.y = y;
+        this.vx = vx;
+        this.vy = vy;
+        this.fixed = fixed;
+        idCounter = Math.max(idCounter, id + 1);
+    }
+
     public Particle(double x, double y) {
         // Para los obstaculos
         this(0, 0, 0, x, y, 0);
@@ -0,0 +1,105 @@
+package simulations;
+
+import static org.junit.jupiter.api.Assertions.assertArrayEquals;
+import static org.junit.jupiter.api.Assertions.assertEquals;
+
+import java.io.IOException;
+import java.nio.file.Files;
+import java.nio.file.Path;
+import java.nio.file.StandardOpenOption;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.Random;
+
+import org.junit.jupiter.api.Test;
+import org.junit.jupiter.api.io.TempDir;
+
+public class CheckpointTest {
+
+    @TempDir
+    Path tmp;
+
+    private static List<Particle> particlesOf(Grid grid) {
+        List<Particle> particles = new ArrayList<>();
+        for (Particle p : grid) {
+            particles.add(p);
+        }
+        return particles;
+    }
+
+    @Test
+    public void roundTripKeepsExactState() throws IOException {
+        final Grid grid = new Grid(20, 0.05, Particle.R_DEFAULT, new Random(7));
+        final Path file = Checkpoint.of(grid, 7, 1, 0.25, 1234).write(tmp);
+        assertEquals(file, Checkpoint.latest(tmp));
+
+        final Checkpoint read = Checkpoint.read(file);
+        assertEquals(20, read.N());
+        assertEquals(0.05, read.L());
+        assertEquals(7, read.seed());
+        assertEquals(1, read.events());
+        assertEquals(0.25, read.time());
+        assertEquals(1234, read.dynamicBytes());
+
+        final List<Particle> original = particlesOf(grid);
+        final List<Particle> restored = particlesOf(read.toGrid());
+        assertEquals(original.size(), restored.size());
+        for (int i = 0; i < original.size(); i++) {
+            assertEquals(original.get(i).getId(), restored.get(i).getId());
+            assertEquals(original.get(i).isFixed(), restored.get(i).isFixed());
+            assertEquals(original.get(i), restored.get(i));
+        }
+    }
+
+    @Test
+    public void restoredGridContinuesIdentically() throws IOException {
+        final Grid grid = new Grid(20, 0.05, Particle.R_DEFAULT, new Random(11));
+        final Grid restored = Checkpoint.read(Checkpoint.of(grid, 11, 1, 0, 0).write(tmp)).toGrid();
+        for (int step = 0; step < 50; step++) {
+            for (Grid g : List.of(grid, restored)) {
+                List<Event> events = g.getNextEvents();
+                g.move(events.get(0).getTime());
+                for (Event event : events) {
+                    event.processEvent();
+                }
+                g.clampAll();
+            }
+        }
+        final List<Particle> a = particlesOf(grid);
+        final List<Particle> b = particlesOf(restored);
+        for (int i = 0; i < a.size(); i++) {
+            assertEquals(a.get(i), b.get(i));
+        }
+    }
+
+    private static void assertSameFiles(Path expected, Path actual) throws IOException {
+        for (String name : List.of("static.txt", "dynamic.txt")) {
+            assertArrayEquals(Files.readAllBytes(expected.resolve(name)), Files.readAllBytes(actual.resolve(name)),
+                    name);
+        }
+    }
+
+    @Test
+    public void resumedRunMatchesUninterruptedRun() throws IOException {
+        final Path full = tmp.resolve("full");
+        final Path resumed = tmp.resolve("resumed");
+        App.run(full, new String[] {"r", "20", "0.05", "200", "--seed", "5", "--checkpoint-every", "0"});
+        App.run(resumed, new String[] {"r", "20", "0.05", "80", "--seed", "5", "--checkpoint-every", "30"});
+        App.run(resumed, new String[] {"--resume", "r", "200"});
+        assertSameFiles(full.resolve("r"), resumed.resolve("r"));
+    }
+
+    @Test
+    public void resumeDiscardsOutputWrittenAfterTheCheckpoint() throws IOException {
+        final Path full = tmp.resolve("full");
+        final Path resumed = tmp.resolve("resumed");
+        App.run(full, new String[] {"r", "20", "0.05", "200", "--seed", "5", "--checkpoint-every", "0"});
+        App.run(resumed, new String[] {"r", "20", "0.05", "80", "--seed", "5", "--checkpoint-every", "30"});
+        // Como si el proceso hubiera muerto a mitad de un frame antes del checkpoint final
+        final Path run = resumed.resolve("r");
+        Files.delete(run.resolve(Checkpoint.FOLDER).resolve("ckpt_000000080.bin"));
+        Files.writeString(run.resolve("dynamic.txt"), "12.345 3\n0.01", StandardOpenOption.APPEND);
+        App.run(resumed, new String[] {"--resume", "r", "200"});
+        assertSameFiles(full.resolve("r"), run);
+    }
+}